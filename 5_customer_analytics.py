@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Customer Analytics Script
+RFM scores and cohort retention for every customer (see retail_pipeline/customers.py)
+"""
+
+import argparse
+import sys
+
+from retail_pipeline import analyze_customers
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Score every customer (RFM) and compute cohort retention')
+    parser.add_argument('--load-db', action='store_true',
+                        help='Also load the customer_rfm and cohort_retention tables into the database')
+    args = parser.parse_args()
+
+    try:
+        analyze_customers(load_db=args.load_db)
+    except Exception:
+        # analyze_customers has already printed the error and what to check
+        sys.exit(1)
@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Local Analytics Service
+Loads the cleaned dataset (or the online_retail table) once and serves the
+business answers, filtered aggregations and charts over HTTP from memory
+
+Endpoints:
+    GET /health                  dataset size, load time and cache statistics
+    GET /answers                 business answers (same document as business_answers.json)
+    GET /queries/<name>          rows of one business query (see retail_pipeline/business_queries.py)
+    GET /aggregate               ?group_by=country,hour&start=2011-01-01&end=2011-07-01
+                                 &country=France&customer=12345&measure=revenue,invoices
+    GET /timeseries              ?freq=D&start=2011-01-01&end=2011-02-01&measure=revenue,invoices
+                                 (answered from the prefix-sum time index, see retail_pipeline/time_index.py)
+    GET /customers/<id>          summary, monthly history and top products of one customer
+    GET /charts                  available charts
+    GET /charts/<name>.png       chart rendered on demand (?dpi=100)
+"""
+
+import pandas as pd
+import numpy as np
+import argparse
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from retail_pipeline.aggregation import load_or_build_aggregates
+from retail_pipeline.business_queries import QUERIES, build_answers
+from retail_pipeline.cleaning import categorize_hour
+from retail_pipeline.config import CLEANED_FILE, DB_CONFIG, get_connection_string
+from retail_pipeline.time_index import BUCKET, TimeIndex, load_or_build_time_index
+
+day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+time_order = ['Morning', 'Afternoon', 'Evening', 'Night']
+
+# online_retail columns (3_database_import.py) back to the cleaned CSV names
+DB_COLUMNS = {
+    'invoice_no': 'InvoiceNo', 'stock_code': 'StockCode', 'description': 'Description',
+    'quantity': 'Quantity', 'invoice_date': 'InvoiceDate', 'unit_price': 'UnitPrice',
+    'customer_id': 'CustomerID', 'country': 'Country', 'description_imputed': 'Description_imputed',
+    'customer_id_imputed': 'CustomerID_imputed', 'total_revenue': 'TotalRevenue', 'year': 'Year',
+    'month': 'Month', 'day': 'Day', 'day_of_week': 'DayOfWeek', 'hour': 'Hour', 'date': 'Date',
+    'time_of_day': 'TimeOfDay', 'high_value_transaction': 'HighValueTransaction',
+    'extreme_quantity': 'ExtremeQuantity', 'extreme_price': 'ExtremePrice',
+    'extreme_revenue': 'ExtremeRevenue', 'has_customerid': 'has_customerid',
+    'stock_code_original': 'StockCodeOriginal', 'returned_quantity': 'ReturnedQuantity',
+    'net_quantity': 'NetQuantity', 'net_revenue': 'NetRevenue', 'invoice_return_rate': 'InvoiceReturnRate'
+}
+
+# Dimensions accepted by /aggregate?group_by=
+GROUP_COLUMNS = {
+    'country': 'Country', 'day_of_week': 'DayOfWeek', 'time_of_day': 'TimeOfDay', 'hour': 'Hour',
+    'date': 'Date', 'month': 'YearMonth', 'customer': 'CustomerID_imputed', 'product': 'StockCode'
+}
+
+# Measures accepted by /aggregate?measure=: output column -> (source column, aggregation)
+MEASURES = {
+    'revenue': ('TotalRevenue', 'sum'),
+    'net_revenue': ('NetRevenue', 'sum'),
+    'quantity': ('Quantity', 'sum'),
+    'invoices': ('InvoiceNo', 'nunique'),
+    'lines': ('InvoiceNo', 'size'),
+}
+
+
+def load_dataset(source='csv', input_file=CLEANED_FILE, dsn=None):
+    """Read the cleaned data from the CSV or the online_retail table, sorted by InvoiceDate"""
+    if source == 'db':
+        from sqlalchemy import create_engine
+        engine = create_engine(dsn or get_connection_string(DB_CONFIG))
+        try:
+            data = pd.read_sql('SELECT * FROM online_retail', engine).drop(columns=['id'], errors='ignore')
+        finally:
+            engine.dispose()
+        data = data.rename(columns=DB_COLUMNS)
+        data['InvoiceNo'] = data['InvoiceNo'].astype(str)
+        data['StockCode'] = data['StockCode'].astype(str)
+    else:
+        data = pd.read_csv(input_file, dtype={'InvoiceNo': str, 'StockCode': str})
+    data['InvoiceDate'] = pd.to_datetime(data['InvoiceDate'])
+    data['Date'] = data['InvoiceDate'].dt.strftime('%Y-%m-%d')
+    data['YearMonth'] = data['InvoiceDate'].dt.strftime('%Y-%m')
+    return data.sort_values('InvoiceDate', kind='stable').reset_index(drop=True)
+
+
+def frame_records(df):
+    """DataFrame -> list of JSON-safe dicts (timestamps as ISO strings, NaN as null)"""
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def customer_summary(data):
+    """Per-customer orders, revenue, average line value and last purchase (known customers only)"""
+    known = data[data['CustomerID_imputed'] > 0]
+    return known.groupby('CustomerID_imputed').agg(
+        total_orders=('InvoiceNo', 'nunique'),
+        total_revenue=('TotalRevenue', 'sum'),
+        avg_order_value=('TotalRevenue', 'mean'),
+        last_purchase_date=('InvoiceDate', 'max')).rename_axis('customer_id').reset_index()
+
+
+def sales_by(hourly, keys, output_column, order):
+    """Transactions, revenue and quantity per category, in the given category order
+
+    Summed from the hourly buckets of the time index: an invoice has one
+    timestamp, so per-bucket invoice counts add up to distinct invoices.
+    """
+    sales = hourly.groupby(keys).sum()
+    sales = sales[sales['lines'] > 0]
+    sales = sales.reindex([c for c in order if c in sales.index])
+    sales = pd.DataFrame({
+        'number_of_transactions': sales['invoices'],
+        'total_revenue': sales['revenue'],
+        'avg_revenue_per_transaction': sales['revenue'] / sales['lines'],
+        'total_quantity_sold': sales['quantity']})
+    return sales.rename_axis(output_column).reset_index()
+
+
+def products_bought_together(data, min_count=5, limit=20):
+    """Pandas version of the co-occurrence query, joined on integer ids instead of strings"""
+    lines = data.loc[data['CustomerID_imputed'] > 0, ['InvoiceNo', 'StockCode', 'Description_imputed']]
+    lines = lines.drop_duplicates()
+    # Items are numbered in (StockCode, Description) order, so item order follows StockCode order
+    item = lines.groupby(['StockCode', 'Description_imputed'], sort=True).ngroup().to_numpy(np.int32)
+    code = pd.factorize(lines['StockCode'], sort=True)[0].astype(np.int32)
+    invoice = pd.factorize(lines['InvoiceNo'])[0].astype(np.int32)
+    baskets = pd.DataFrame({'invoice': invoice, 'item': item, 'code': code})
+    pairs = baskets.merge(baskets, on='invoice')
+    pairs = pairs[pairs['code_x'] < pairs['code_y']]
+    # Rows are distinct per invoice, so the pair count equals COUNT(DISTINCT invoice_no)
+    counts = pairs.groupby(['item_x', 'item_y']).size()
+    counts = counts[counts >= min_count].sort_values(ascending=False, kind='stable').head(limit)
+
+    catalog = lines.assign(item=item).drop_duplicates('item').set_index('item')
+    first = catalog.loc[counts.index.get_level_values(0)]
+    second = catalog.loc[counts.index.get_level_values(1)]
+    return pd.DataFrame({
+        'product1_code': first['StockCode'].to_numpy(),
+        'product1_description': first['Description_imputed'].str[:40].to_numpy(),
+        'product2_code': second['StockCode'].to_numpy(),
+        'product2_description': second['Description_imputed'].str[:40].to_numpy(),
+        'co_occurrence_count': counts.to_numpy()
+    })
+
+
+def summary_statistics(data):
+    """Totals over the known-customer transactions"""
+    known = data[data['CustomerID_imputed'] > 0]
+    return pd.DataFrame([{
+        'total_transactions': len(known),
+        'unique_invoices': known['InvoiceNo'].nunique(),
+        'unique_customers': known['CustomerID_imputed'].nunique(),
+        'unique_products': known['StockCode'].nunique(),
+        'total_revenue': known['TotalRevenue'].sum(),
+        'total_net_revenue': known['NetRevenue'].sum(),
+        'avg_revenue_per_transaction': known['TotalRevenue'].mean(),
+        'total_quantity_sold': known['Quantity'].sum(),
+        'avg_quantity_per_transaction': known['Quantity'].mean()
+    }])
+
+
+def most_returned_products(data, limit=10):
+    """Products with the most revenue taken back by matched returns"""
+    products = data.groupby(['StockCode', 'Description_imputed']).agg(
+        quantity_sold=('Quantity', 'sum'),
+        quantity_returned=('ReturnedQuantity', 'sum'),
+        total_revenue=('TotalRevenue', 'sum'),
+        net_revenue=('NetRevenue', 'sum'))
+    products = products[products['quantity_returned'] > 0]
+    products['returned_revenue'] = products['total_revenue'] - products['net_revenue']
+    products['return_rate'] = products['returned_revenue'] / products['total_revenue']
+    products = products.drop(columns='net_revenue').sort_values('returned_revenue', ascending=False).head(limit)
+    products = products.rename_axis(['stock_code', 'description']).reset_index()
+    products['description'] = products['description'].str[:40]
+    return products
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of encoded responses keyed by path and normalized query string"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class AnalyticsService:
+    """Holds the dataset in memory and answers requests against it"""
+
+    def __init__(self, data, cube, products, source, load_seconds=None, time_index=None):
+        self.data = data
+        self.cube = cube
+        self.products = products
+        self.time_index = time_index or TimeIndex.build(data)
+        self.source = source
+        self.load_seconds = load_seconds
+        self.customers = customer_summary(data)
+        # Row positions grouped by customer so /customers/<id> is a binary search, not a scan
+        self._customer_order = np.argsort(data['CustomerID_imputed'].to_numpy(), kind='stable')
+        self._customer_keys = data['CustomerID_imputed'].to_numpy()[self._customer_order]
+        self._dates = data['InvoiceDate'].to_numpy()
+        self._query_results = {}
+        self._query_lock = threading.Lock()
+        # Matplotlib is not thread-safe; charts render one at a time
+        self._render_lock = threading.Lock()
+        self._visualization = None
+
+    def query(self, name):
+        """Result of one business query, computed on first use and kept"""
+        with self._query_lock:
+            if name not in self._query_results:
+                self._query_results[name] = self._run_query(name)
+            return self._query_results[name]
+
+    def _run_query(self, name):
+        if name == 'best_customers_by_revenue':
+            return self.customers.sort_values('total_revenue', ascending=False).head(10).reset_index(drop=True)
+        if name == 'best_customers_by_frequency':
+            return self.customers.sort_values('total_orders', ascending=False).head(10).reset_index(drop=True)
+        if name == 'sales_by_time_of_day':
+            hourly = self.time_index.hourly()
+            return sales_by(hourly, hourly.index.hour.map(categorize_hour), 'time_of_day', time_order)
+        if name == 'sales_by_day_of_week':
+            hourly = self.time_index.hourly()
+            return sales_by(hourly, hourly.index.day_name(), 'day_of_week', day_order)
+        if name == 'sales_by_hour':
+            hourly = self.time_index.hourly()
+            hourly = sales_by(hourly, hourly.index.hour, 'hour', range(24))
+            return hourly.drop(columns='total_quantity_sold').sort_values('total_revenue', ascending=False) \
+                .head(10).reset_index(drop=True)
+        if name == 'products_bought_together':
+            return products_bought_together(self.data)
+        if name == 'summary_statistics':
+            return summary_statistics(self.data)
+        if name == 'most_returned_products':
+            return most_returned_products(self.data)
+        raise KeyError(f"Unknown query: {name}. Available: {', '.join(q[0] for q in QUERIES)}")
+
+    def answers(self):
+        return build_answers({name: self.query(name) for name, _, _, _ in QUERIES})
+
+    def aggregate(self, group_by=None, start=None, end=None, country=None, customer=None, measure=None):
+        """Measures over a date range [start, end) with optional filters, grouped by any dimensions"""
+        # Rows are sorted by InvoiceDate, so the date range is two binary searches
+        low = np.searchsorted(self._dates, np.datetime64(pd.Timestamp(start)), 'left') if start else 0
+        high = np.searchsorted(self._dates, np.datetime64(pd.Timestamp(end)), 'left') if end else len(self.data)
+        subset = self.data.iloc[low:high]
+        if country:
+            subset = subset[subset['Country'].isin(country.split(','))]
+        if customer:
+            subset = subset[subset['CustomerID_imputed'] == int(customer)]
+
+        measures = measure.split(',') if measure else list(MEASURES)
+        unknown = [m for m in measures if m not in MEASURES]
+        if unknown:
+            raise ValueError(f"Unknown measure: {', '.join(unknown)}. Available: {', '.join(MEASURES)}")
+        aggregations = {m: MEASURES[m] for m in measures}
+
+        if not (group_by or country or customer) and all(
+                bound is None or pd.Timestamp(bound) == pd.Timestamp(bound).floor(BUCKET) for bound in (start, end)):
+            # Whole-hour range totals are two lookups in the time index
+            return pd.DataFrame([self.time_index.range(start, end, measures)])
+        if not group_by:
+            return pd.DataFrame([{m: subset[column].agg(how) for m, (column, how) in aggregations.items()}])
+        dimensions = group_by.split(',')
+        unknown = [d for d in dimensions if d not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown group_by: {', '.join(unknown)}. Available: {', '.join(GROUP_COLUMNS)}")
+        result = subset.groupby([GROUP_COLUMNS[d] for d in dimensions]).agg(**aggregations)
+        result.index.names = dimensions
+        return result.reset_index()
+
+    def timeseries(self, freq='D', start=None, end=None, measure=None):
+        """Measures per period from the time index: one lookup per period, no scan"""
+        measures = measure.split(',') if measure else None
+        series = self.time_index.resample(freq, start, end, measures)
+        return series.rename_axis('period').reset_index()
+
+    def customer(self, customer_id):
+        """Summary, monthly history and top products for one customer (None if unknown)"""
+        low, high = np.searchsorted(self._customer_keys, [customer_id, customer_id + 1])
+        if customer_id <= 0 or low == high:
+            return None
+        rows = self.data.iloc[np.sort(self._customer_order[low:high])]
+        monthly = rows.groupby('YearMonth').agg(
+            revenue=('TotalRevenue', 'sum'), invoices=('InvoiceNo', 'nunique')).reset_index()
+        top_products = rows.groupby(['StockCode', 'Description_imputed']).agg(
+            revenue=('TotalRevenue', 'sum'), quantity=('Quantity', 'sum')) \
+            .sort_values('revenue', ascending=False).head(10).reset_index()
+        return {
+            'customer_id': customer_id,
+            'country': rows['Country'].mode().iloc[0],
+            'total_orders': int(rows['InvoiceNo'].nunique()),
+            'total_revenue': float(rows['TotalRevenue'].sum()),
+            'total_quantity': int(rows['Quantity'].sum()),
+            'first_purchase_date': rows['InvoiceDate'].iloc[0].isoformat(),
+            'last_purchase_date': rows['InvoiceDate'].iloc[-1].isoformat(),
+            'monthly': frame_records(monthly),
+            'top_products': frame_records(top_products),
+        }
+
+    @property
+    def visualization(self):
+        """The plot registry of the visualization stage, imported on the first chart request"""
+        if self._visualization is None:
+            from retail_pipeline import visualization
+            self._visualization = visualization
+        return self._visualization
+
+    def chart(self, name, dpi):
+        """Render one registered chart to PNG bytes"""
+        _, _, _, prepare, build = self.visualization.get_plot(name)
+        with self._render_lock:
+            frame = prepare(self.data, self.cube, self.products, self.time_index)
+            buffer = io.BytesIO()
+            build(frame).save(buffer, format='png', dpi=dpi, verbose=False)
+        return buffer.getvalue()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the service; responses are cached by URL"""
+
+    service = None
+    cache = None
+    quiet = False
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        key = url.path + '?' + '&'.join(f'{k}={params[k]}' for k in sorted(params))
+
+        cached = self.cache.get(key) if url.path != '/health' else None
+        if cached is not None:
+            status, content_type, body = cached
+        else:
+            status, content_type, body = self.route(url.path.rstrip('/') or '/', params)
+            if status == 200 and url.path != '/health':
+                self.cache.put(key, (status, content_type, body))
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Cache', 'hit' if cached is not None else 'miss')
+        self.end_headers()
+        self.wfile.write(body)
+
+        if not self.quiet:
+            print(f"{self.command} {self.path} -> {status} "
+                  f"({(time.perf_counter() - start) * 1000:.1f} ms, {'hit' if cached is not None else 'miss'})")
+
+    def route(self, path, params):
+        """Return (status, content type, body) for one request"""
+        service = self.service
+        try:
+            if path == '/health':
+                return self.json(200, {
+                    'status': 'ok', 'source': service.source, 'rows': len(service.data),
+                    'load_seconds': service.load_seconds,
+                    'cache': {'entries': len(self.cache.entries), 'hits': self.cache.hits,
+                              'misses': self.cache.misses}})
+            if path == '/answers':
+                return self.json(200, service.answers())
+            if path.startswith('/queries/'):
+                return self.json(200, frame_records(service.query(path[len('/queries/'):])))
+            if path == '/aggregate':
+                return self.json(200, frame_records(service.aggregate(**params)))
+            if path == '/timeseries':
+                return self.json(200, frame_records(service.timeseries(**params)))
+            if path.startswith('/customers/'):
+                summary = service.customer(int(path[len('/customers/'):]))
+                if summary is None:
+                    return self.json(404, {'error': 'Unknown customer'})
+                return self.json(200, summary)
+            if path == '/charts':
+                return self.json(200, [{'name': name, 'description': description, 'url': f'/charts/{name}.png'}
+                                       for name, _, description, _, _ in service.visualization.PLOTS])
+            if path.startswith('/charts/') and path.endswith('.png'):
+                name = path[len('/charts/'):-len('.png')]
+                return 200, 'image/png', service.chart(name, int(params.get('dpi', 100)))
+            return self.json(404, {'error': f'Unknown endpoint: {path}'})
+        except (KeyError, ValueError, TypeError) as e:
+            return self.json(400, {'error': str(e).strip('"')})
+        except Exception as e:
+            return self.json(500, {'error': f'{type(e).__name__}: {e}'})
+
+    @staticmethod
+    def json(status, payload):
+        return status, 'application/json', json.dumps(payload, default=str).encode('utf-8')
+
+    def log_message(self, format, *args):
+        # do_GET prints its own line with latency and cache status
+        pass
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Serve the Online Retail analytics over HTTP')
+    parser.add_argument('--source', choices=['csv', 'db'], default='csv',
+                        help='Load the cleaned CSV or the online_retail table')
+    parser.add_argument('--input', default=CLEANED_FILE, help='Cleaned CSV to load with --source csv')
+    parser.add_argument('--dsn', default=None,
+                        help='SQLAlchemy URL for --source db (default: retail_pipeline/config.py DB_CONFIG)')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8050, help='Port to listen on')
+    parser.add_argument('--cache-size', type=int, default=256, help='Number of cached responses')
+    parser.add_argument('--quiet', action='store_true', help='Do not print a line per request')
+    args = parser.parse_args()
+
+    print("=== Analytics Service ===")
+    print(f"Loading dataset from {'online_retail table' if args.source == 'db' else args.input}...")
+    start = time.perf_counter()
+    data = load_dataset(args.source, args.input, args.dsn)
+    # The saved aggregates and time index describe the cleaned CSV, so only it may reuse them
+    from_source = args.source == 'csv' and args.input == CLEANED_FILE
+    cube, products = load_or_build_aggregates(data, from_source=from_source)
+    time_index = load_or_build_time_index(data, from_source=from_source)
+    service = AnalyticsService(data, cube, products, args.source, round(time.perf_counter() - start, 2),
+                               time_index)
+    print(f"Dataset shape: {data.shape} (loaded in {service.load_seconds:.1f}s)")
+
+    RequestHandler.service = service
+    RequestHandler.cache = ResponseCache(args.cache_size)
+    RequestHandler.quiet = args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+    print(f"Listening on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
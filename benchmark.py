@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+End-to-End Stage Benchmark Suite
+Times cleaning, visualization, customer analytics, database import and each business query
+against synthetic datasets of increasing size
+"""
+
+import pandas as pd
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from generate_synthetic_data import REFERENCE_ROWS, generate_retail_data, write_dataset
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (stage, script, artifact the script writes on success, relative to the run directory)
+# A failing script exits with a non-zero code; a missing artifact also marks a stage that exited cleanly as failed
+STAGES = [
+    ('cleaning', '1_data_cleaning.py', 'output/online_retail_cleaned.csv'),
+    ('visualization', '2_data_visualization.py', 'output/visualizations/12_heatmap_day_time.png'),
+    ('customers', '5_customer_analytics.py', 'output/customers/customer_rfm.csv'),
+    ('import', '3_database_import.py', 'output/database_info.json'),
+]
+
+
+def get_git_commit():
+    """Short commit hash of the benchmarked tree, if available"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def prepare_dataset(rows, seed, data_dir):
+    """Generate (or reuse) the synthetic dataset for a row count"""
+    path = os.path.join(data_dir, f'synthetic_{rows}_seed{seed}.csv.gz')
+    if os.path.exists(path):
+        print(f"Reusing dataset: {path}")
+    else:
+        print(f"Generating {rows:,} rows -> {path}")
+        write_dataset(generate_retail_data(rows, seed=seed), path)
+    return path
+
+
+def run_stage(stage, script, artifact, run_dir, extra_args, log_file):
+    """Run one pipeline script inside run_dir and time it"""
+    command = [sys.executable, os.path.join(PROJECT_DIR, script)] + extra_args
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=run_dir, stdout=log_file, stderr=subprocess.STDOUT)
+    seconds = time.perf_counter() - start
+
+    if result.returncode != 0:
+        status = f'failed (exit code {result.returncode})'
+    elif not os.path.exists(os.path.join(run_dir, artifact)):
+        status = f'failed (missing {artifact})'
+    else:
+        status = 'ok'
+    return seconds, status
+
+
+def time_queries(repeats):
+    """Time each business query against the database the import stage just loaded"""
+    from sqlalchemy import create_engine
+    from retail_pipeline.business_queries import QUERIES
+    from retail_pipeline.config import DB_CONFIG, get_connection_string
+
+    engine = create_engine(get_connection_string(DB_CONFIG))
+    timings = []
+    try:
+        for name, title, query, output_name in QUERIES:
+            samples = []
+            status = 'ok'
+            for _ in range(repeats):
+                start = time.perf_counter()
+                try:
+                    pd.read_sql(query, engine)
+                except Exception as e:
+                    status = f'failed ({type(e).__name__})'
+                    break
+                samples.append(time.perf_counter() - start)
+            seconds = float(pd.Series(samples).median()) if samples else None
+            timings.append((f'query:{name}', seconds, status))
+    finally:
+        engine.dispose()
+    return timings
+
+
+def benchmark_size(rows, seed, args, run_id):
+    """Run every selected stage against one dataset size"""
+    dataset = prepare_dataset(rows, seed, args.data_dir)
+    run_dir = os.path.join(args.output_dir, 'runs', f'{run_id}_{rows}')
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+
+    results = []
+    stage_ok = {}
+    with open(os.path.join(run_dir, 'stage_output.log'), 'w') as log_file:
+        for stage, script, artifact in STAGES:
+            if stage not in args.stages:
+                continue
+            if stage != 'cleaning' and not stage_ok.get('cleaning', False):
+                results.append((stage, None, 'skipped (no cleaned data)'))
+                continue
+            extra_args = ['--input', os.path.abspath(dataset)] if stage == 'cleaning' else []
+            print(f"  {stage}...", end=' ', flush=True)
+            seconds, status = run_stage(stage, script, artifact, run_dir, extra_args, log_file)
+            print(f"{seconds:.2f}s [{status}]")
+            stage_ok[stage] = status == 'ok'
+            results.append((stage, seconds, status))
+
+    if 'queries' in args.stages:
+        if stage_ok.get('import', False):
+            print("  queries...")
+            for stage, seconds, status in time_queries(args.query_repeats):
+                shown = f"{seconds:.3f}s" if seconds is not None else '-'
+                print(f"    {stage}: {shown} [{status}]")
+                results.append((stage, seconds, status))
+        else:
+            results.append(('queries', None, 'skipped (import did not succeed)'))
+
+    return [{
+        'run_id': run_id,
+        'git_commit': args.git_commit,
+        'seed': seed,
+        'dataset_rows': rows,
+        'stage': stage,
+        'seconds': round(seconds, 4) if seconds is not None else None,
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        'status': status
+    } for stage, seconds, status in results]
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[REFERENCE_ROWS, REFERENCE_ROWS * 10],
+                        help='Dataset sizes to benchmark (default: 1x and 10x the original data)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the synthetic data')
+    parser.add_argument('--stages', nargs='+', default=['cleaning', 'visualization', 'customers', 'import', 'queries'],
+                        choices=['cleaning', 'visualization', 'customers', 'import', 'queries'], help='Stages to time')
+    parser.add_argument('--query-repeats', type=int, default=3,
+                        help='Times to run each query; the median is reported')
+    parser.add_argument('--data-dir', default='output/benchmarks/data', help='Where synthetic datasets are cached')
+    parser.add_argument('--output-dir', default='output/benchmarks', help='Where results are written')
+    args = parser.parse_args()
+
+    if 'import' in args.stages or 'queries' in args.stages:
+        print("NOTE: the import stage replaces the online_retail table in the configured database.")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    args.git_commit = get_git_commit()
+
+    records = []
+    for rows in args.rows:
+        print(f"\n=== Benchmarking {rows:,} rows ===")
+        records.extend(benchmark_size(rows, args.seed, args, run_id))
+
+    results = pd.DataFrame(records)
+    results_file = os.path.join(args.output_dir, f'results_{run_id}.csv')
+    results.to_csv(results_file, index=False)
+
+    # Keep every run in one table so results can be compared across commits
+    history_file = os.path.join(args.output_dir, 'benchmark_history.csv')
+    results.to_csv(history_file, mode='a', index=False, header=not os.path.exists(history_file))
+
+    with open(os.path.join(args.output_dir, f'results_{run_id}.json'), 'w') as f:
+        json.dump(records, f, indent=2)
+
+    print("\n=== Benchmark Results (seconds) ===")
+    table = results.pivot_table(index='stage', columns='dataset_rows', values='seconds', sort=False)
+    print(table.to_string(float_format=lambda v: f'{v:.3f}'))
+
+    print(f"\nResults saved to: {results_file}")
+    print(f"History appended to: {history_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Synthetic Data Generator for the Online Retail Dataset
+Produces seeded, statistically similar retail data at any target row count
+"""
+
+import pandas as pd
+import numpy as np
+import argparse
+import os
+
+# Shape of the original 541,909-row Online Retail.xlsx that the generator mimics
+REFERENCE_ROWS = 541909
+REFERENCE_CUSTOMERS = 4372
+REFERENCE_PRODUCTS = 4070
+CANCELLED_LINE_RATE = 0.0171   # 9,288 'C' invoice lines
+MISSING_CUSTOMER_RATE = 0.25   # share of invoices without CustomerID
+MISSING_DESCRIPTION_RATE = 0.0027
+START_DATE = pd.Timestamp('2010-12-01')
+END_DATE = pd.Timestamp('2011-12-09 20:00')
+FIRST_INVOICE_NO = 536365
+XLSX_MAX_ROWS = 1048575
+
+COLUMNS = ['InvoiceNo', 'StockCode', 'Description', 'Quantity', 'InvoiceDate', 'UnitPrice', 'CustomerID', 'Country']
+
+# Approximate share of rows per country in the original data
+COUNTRY_WEIGHTS = {
+    'United Kingdom': 0.914, 'Germany': 0.0175, 'France': 0.0158, 'EIRE': 0.0151, 'Spain': 0.0047,
+    'Netherlands': 0.0044, 'Belgium': 0.0038, 'Switzerland': 0.0037, 'Portugal': 0.0028, 'Australia': 0.0023,
+    'Norway': 0.002, 'Italy': 0.0015, 'Channel Islands': 0.0014, 'Finland': 0.0013, 'Cyprus': 0.0011,
+    'Sweden': 0.0009, 'Unspecified': 0.0008, 'Austria': 0.0007, 'Denmark': 0.0007, 'Japan': 0.0007,
+    'Poland': 0.0006, 'Israel': 0.0005, 'USA': 0.0005, 'Hong Kong': 0.0005, 'Singapore': 0.0004,
+    'Iceland': 0.0003, 'Canada': 0.0003, 'Greece': 0.0003, 'Malta': 0.0002, 'United Arab Emirates': 0.0001,
+    'European Community': 0.0001, 'RSA': 0.0001, 'Lebanon': 0.0001, 'Lithuania': 0.0001, 'Brazil': 0.0001,
+    'Czech Republic': 0.0001, 'Bahrain': 0.0001, 'Saudi Arabia': 0.00002
+}
+
+# Monday..Sunday; the original data has no Saturday trading
+WEEKDAY_WEIGHTS = np.array([0.16, 0.19, 0.18, 0.22, 0.15, 0.0, 0.12])
+# Hours 0..23, trading between 6:00 and 20:00 with a lunchtime peak
+HOUR_WEIGHTS = np.array([0, 0, 0, 0, 0, 0, 0.001, 0.007, 0.06, 0.08, 0.12, 0.14, 0.16, 0.14,
+                         0.12, 0.08, 0.05, 0.02, 0.01, 0.005, 0.002, 0, 0, 0])
+# December..December seasonality, busiest in the autumn
+MONTH_WEIGHTS = {1: 0.8, 2: 0.7, 3: 0.9, 4: 0.8, 5: 0.9, 6: 0.9, 7: 0.9, 8: 0.9, 9: 1.3, 10: 1.5, 11: 1.8, 12: 1.1}
+
+QUANTITY_VALUES = np.array([1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 20, 24, 36, 48, 72, 96, 144, 288])
+QUANTITY_WEIGHTS = np.array([0.17, 0.14, 0.07, 0.07, 0.03, 0.09, 0.04, 0.06, 0.18, 0.02,
+                             0.01, 0.05, 0.02, 0.02, 0.01, 0.01, 0.008, 0.002])
+
+DESCRIPTION_ADJECTIVES = ['WHITE', 'RED', 'PINK', 'BLUE', 'GREEN', 'CREAM', 'IVORY', 'VINTAGE', 'RETRO',
+                          'REGENCY', 'JUMBO', 'SMALL', 'LARGE', 'SET OF 3', 'SET OF 6', 'ASSORTED',
+                          'HANGING', 'GLASS', 'WOODEN', 'ZINC', 'PAPER', 'FELTCRAFT', 'SPOTTY', 'FLORAL']
+DESCRIPTION_THEMES = ['HEART', 'CHRISTMAS', 'POLKADOT', 'BIRD', 'RABBIT', 'OWL', 'STAR', 'ROSE',
+                      'SKULL', 'DOLLY GIRL', 'SPACEBOY', 'PARIS', 'LOVE', 'GARDEN', 'TEA PARTY', 'ALPHABET']
+DESCRIPTION_ITEMS = ['T-LIGHT HOLDER', 'LUNCH BAG', 'CAKE STAND', 'TEACUP AND SAUCER', 'BUNTING',
+                     'HOT WATER BOTTLE', 'NAPKINS', 'CANDLE', 'LANTERN', 'PHOTO FRAME', 'DOORMAT',
+                     'WALL CLOCK', 'JAM MAKING SET', 'PARTY BUNTING', 'SHOPPER BAG', 'CUSHION COVER',
+                     'STORAGE TIN', 'CHALKBOARD', 'MUG', 'GIFT WRAP', 'COAT HANGER', 'NIGHT LIGHT']
+
+
+def power_law_weights(n, exponent):
+    """Normalized Zipf-style weights 1/rank^exponent for n ranked entities"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def build_catalog(rng, n_products):
+    """Create stock codes, descriptions (with occasional misspelt variants) and base prices"""
+    codes = rng.choice(np.arange(10000, 99999), size=n_products, replace=False).astype(str)
+    suffixed = rng.random(n_products) < 0.12
+    codes = np.where(suffixed, np.char.add(codes, rng.choice(list('ABCDEFGLMNPRSW'), size=n_products)), codes)
+
+    descriptions = np.char.add(np.char.add(np.char.add(np.char.add(
+        rng.choice(DESCRIPTION_ADJECTIVES, size=n_products), ' '),
+        rng.choice(DESCRIPTION_THEMES, size=n_products)), ' '),
+        rng.choice(DESCRIPTION_ITEMS, size=n_products))
+
+    # Alternative spellings as seen in the original data (dropped letters, swapped word order)
+    variants = descriptions.copy()
+    for i in np.flatnonzero(rng.random(n_products) < 0.15):
+        words = variants[i].split(' ')
+        if len(words) > 2 and rng.random() < 0.5:
+            words[0], words[1] = words[1], words[0]
+            variants[i] = ' '.join(words)
+        else:
+            pos = rng.integers(1, len(variants[i]))
+            variants[i] = variants[i][:pos] + variants[i][pos + 1:]
+
+    prices = np.round(rng.lognormal(mean=0.9, sigma=0.8, size=n_products), 2).clip(0.1, 650.0)
+    return pd.DataFrame({'StockCode': codes, 'Description': descriptions,
+                         'DescriptionVariant': variants, 'UnitPrice': prices})
+
+
+def sample_timestamps(rng, n):
+    """Draw invoice timestamps following the original day-of-week, hour and monthly patterns"""
+    days = pd.date_range(START_DATE.normalize(), END_DATE.normalize(), freq='D')
+    day_weights = WEEKDAY_WEIGHTS[days.dayofweek] * np.array([MONTH_WEIGHTS[m] for m in days.month])
+    day_idx = rng.choice(len(days), size=n, p=day_weights / day_weights.sum())
+    hours = rng.choice(24, size=n, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    minutes = rng.integers(0, 60, size=n)
+    return days.values[day_idx] + (hours * 60 + minutes).astype('timedelta64[m]')
+
+
+def generate_retail_data(n_rows, seed=42):
+    """Generate n_rows of Online Retail style line items with a fixed seed"""
+    rng = np.random.default_rng(seed)
+    scale = n_rows / REFERENCE_ROWS
+
+    n_customers = max(50, int(round(REFERENCE_CUSTOMERS * scale)))
+    # Catalogues grow much more slowly than transaction volume
+    n_products = max(50, int(round(REFERENCE_PRODUCTS * np.sqrt(scale))))
+    n_cancel_lines = int(round(n_rows * CANCELLED_LINE_RATE))
+    n_purchase_lines = n_rows - n_cancel_lines
+
+    catalog = build_catalog(rng, n_products)
+    product_p = power_law_weights(n_products, 0.5)
+
+    customer_ids = rng.choice(np.arange(12346, 12346 + int(n_customers * 1.4) + 1), size=n_customers, replace=False)
+    customer_p = power_law_weights(n_customers, 0.7)
+    countries = np.array(list(COUNTRY_WEIGHTS))
+    country_p = np.array(list(COUNTRY_WEIGHTS.values()))
+    country_p = country_p / country_p.sum()
+    customer_country = rng.choice(countries, size=n_customers, p=country_p)
+
+    # Invoice basket sizes: lognormal with median ~13 lines, mean ~21
+    n_invoices = int(n_purchase_lines / 18) + 10
+    basket_sizes = np.ceil(rng.lognormal(mean=2.55, sigma=1.0, size=n_invoices)).astype(int).clip(1, 500)
+    while basket_sizes.sum() < n_purchase_lines:
+        basket_sizes = np.concatenate([basket_sizes, np.ceil(rng.lognormal(2.55, 1.0, n_invoices)).astype(int).clip(1, 500)])
+    cut = np.searchsorted(np.cumsum(basket_sizes), n_purchase_lines)
+    basket_sizes = basket_sizes[:cut + 1]
+    basket_sizes[-1] -= basket_sizes.sum() - n_purchase_lines
+    n_invoices = len(basket_sizes)
+
+    invoice_customer_idx = rng.choice(n_customers, size=n_invoices, p=customer_p)
+    invoice_customer = customer_ids[invoice_customer_idx].astype(float)
+    invoice_country = customer_country[invoice_customer_idx]
+    guest = rng.random(n_invoices) < MISSING_CUSTOMER_RATE
+    invoice_customer[guest] = np.nan
+    invoice_country[guest] = rng.choice(countries, size=guest.sum(), p=country_p)
+    invoice_time = sample_timestamps(rng, n_invoices)
+
+    # Purchase line items
+    line_invoice = np.repeat(np.arange(n_invoices), basket_sizes)
+    product_idx = rng.choice(n_products, size=n_purchase_lines, p=product_p)
+    use_variant = rng.random(n_purchase_lines) < 0.03
+    purchases = pd.DataFrame({
+        'invoice': line_invoice,
+        'StockCode': catalog['StockCode'].values[product_idx],
+        'Description': np.where(use_variant, catalog['DescriptionVariant'].values[product_idx],
+                                catalog['Description'].values[product_idx]).astype(object),
+        'Quantity': rng.choice(QUANTITY_VALUES, size=n_purchase_lines, p=QUANTITY_WEIGHTS / QUANTITY_WEIGHTS.sum()),
+        'UnitPrice': catalog['UnitPrice'].values[product_idx],
+        'cancelled': False
+    })
+    # Bulk buyers get a wholesale discount on large quantities
+    bulk = purchases['Quantity'] >= 24
+    purchases.loc[bulk, 'UnitPrice'] = (purchases.loc[bulk, 'UnitPrice'] * 0.85).round(2)
+
+    # Stock adjustments: no description, no customer, zero price, often negative quantity
+    missing = rng.random(n_purchase_lines) < MISSING_DESCRIPTION_RATE
+    purchases.loc[missing, 'Description'] = np.nan
+    purchases.loc[missing, 'UnitPrice'] = 0.0
+    flip = missing & (rng.random(n_purchase_lines) < 0.5)
+    purchases.loc[flip, 'Quantity'] = -purchases.loc[flip, 'Quantity']
+
+    invoices = pd.DataFrame({'CustomerID': invoice_customer, 'Country': invoice_country,
+                             'InvoiceDate': invoice_time, 'cancelled': False})
+
+    # Cancellations: return part of an earlier purchase line by a known customer
+    eligible = np.flatnonzero(~missing & invoices['CustomerID'].notna().values[line_invoice])
+    source = np.sort(rng.choice(eligible, size=min(n_cancel_lines, len(eligible)), replace=False))
+    cancels = purchases.iloc[source].copy()
+    cancels['Quantity'] = -rng.integers(1, cancels['Quantity'].values + 1)
+    cancels['cancelled'] = True
+    # One cancellation invoice per original invoice, a few days after the purchase
+    source_invoices, cancels['invoice'] = np.unique(cancels['invoice'].values, return_inverse=True)
+    cancel_invoices = invoices.iloc[source_invoices].copy()
+    delay = pd.to_timedelta(rng.exponential(10.0, size=len(cancel_invoices)) * 24 * 60, unit='m').round('min')
+    cancel_invoices['InvoiceDate'] = (cancel_invoices['InvoiceDate'] + delay).clip(upper=END_DATE)
+    cancel_invoices['cancelled'] = True
+    cancels['invoice'] += n_invoices
+
+    invoices = pd.concat([invoices, cancel_invoices], ignore_index=True)
+    # Number invoices in time order, prefixing cancellations with 'C'
+    order = np.argsort(invoices['InvoiceDate'].values, kind='stable')
+    numbers = np.empty(len(invoices), dtype=np.int64)
+    numbers[order] = FIRST_INVOICE_NO + np.arange(len(invoices))
+    invoices['InvoiceNo'] = np.where(invoices['cancelled'], 'C', '') + numbers.astype(str)
+    invoices['sequence'] = numbers
+
+    lines = pd.concat([purchases, cancels], ignore_index=True)
+    lines = lines.drop(columns='cancelled').join(invoices.drop(columns='cancelled'), on='invoice')
+    lines = lines.sort_values('sequence', kind='stable').reset_index(drop=True)
+    return lines[COLUMNS]
+
+
+def write_dataset(data, path):
+    """Save a generated dataset as .csv, .csv.gz or .xlsx based on the file extension"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith('.xlsx'):
+        if len(data) > XLSX_MAX_ROWS:
+            raise ValueError(f"{len(data)} rows exceed the Excel sheet limit of {XLSX_MAX_ROWS}; use .csv or .csv.gz")
+        data.to_excel(path, index=False)
+    else:
+        data.to_csv(path, index=False)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Generate a synthetic Online Retail dataset')
+    parser.add_argument('--rows', type=int, default=REFERENCE_ROWS, help='Number of line items to generate')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed and rows give the same data)')
+    parser.add_argument('--output', default=None,
+                        help='Output file (.csv, .csv.gz or .xlsx), default output/synthetic/synthetic_<rows>.csv')
+    args = parser.parse_args()
+
+    output = args.output or f'output/synthetic/synthetic_{args.rows}.csv'
+    print(f"Generating {args.rows:,} rows (seed={args.seed})...")
+    data = generate_retail_data(args.rows, seed=args.seed)
+    write_dataset(data, output)
+
+    print(f"Invoices: {data['InvoiceNo'].nunique():,}")
+    print(f"Customers: {data['CustomerID'].nunique():,}")
+    print(f"Products: {data['StockCode'].nunique():,}")
+    print(f"Cancelled lines: {data['InvoiceNo'].str.startswith('C').sum():,}")
+    print(f"Missing CustomerID: {data['CustomerID'].isnull().mean() * 100:.2f}%")
+    print(f"Synthetic dataset saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Concurrent Load Test for the Business Query Layer
+Replays the business query workload against PostgreSQL with configurable
+concurrency, arrival rate and query mix, and reports latency percentiles
+"""
+
+import pandas as pd
+import numpy as np
+from sqlalchemy import create_engine, text
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from retail_pipeline.business_queries import QUERIES
+from retail_pipeline.config import DB_CONFIG, get_connection_string
+
+
+def parse_mix(mix):
+    """Parse 'name=weight,name=weight' into normalized query weights (default: equal mix)"""
+    names = [q[0] for q in QUERIES]
+    if not mix:
+        return {name: 1.0 / len(names) for name in names}
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in names:
+            raise ValueError(f"Unknown query in mix: {name}. Available: {', '.join(names)}")
+        weights[name] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+class LoadTest:
+    """Runs the query mix from a pool of worker threads and records every request"""
+
+    def __init__(self, engine, weights, concurrency, rate, duration, max_requests, seed):
+        self.engine = engine
+        self.sql = {name: text(sql) for name, _, sql, _ in QUERIES}
+        self.names = list(weights)
+        self.probabilities = np.array([weights[n] for n in self.names])
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.max_requests = max_requests
+        self.seed = seed
+        self.records = []
+        self._lock = threading.Lock()
+        self._issued = 0
+
+    def _take_ticket(self):
+        """Reserve one request slot; False once the request budget is used up"""
+        with self._lock:
+            if self.max_requests and self._issued >= self.max_requests:
+                return False
+            self._issued += 1
+            return True
+
+    def _execute(self, name, scheduled):
+        """Run one query and record its latency (measured from its scheduled arrival)"""
+        started = time.perf_counter()
+        error = None
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(self.sql[name]).fetchall()
+        except Exception as e:
+            error = type(e).__name__
+        finished = time.perf_counter()
+        with self._lock:
+            self.records.append({
+                'query': name,
+                'scheduled': scheduled - self._start,
+                'latency_ms': (finished - scheduled) * 1000,
+                'service_ms': (finished - started) * 1000,
+                'error': error
+            })
+
+    def _closed_loop_worker(self, worker_id):
+        """Issue queries back to back until the deadline or request budget"""
+        rng = np.random.default_rng(self.seed + worker_id)
+        while time.perf_counter() < self._deadline and self._take_ticket():
+            name = self.names[rng.choice(len(self.names), p=self.probabilities)]
+            self._execute(name, time.perf_counter())
+
+    def _open_loop_worker(self, arrivals):
+        """Serve queued arrivals; queueing delay counts towards latency"""
+        while True:
+            item = arrivals.get()
+            if item is None:
+                return
+            self._execute(*item)
+
+    def run(self):
+        """Run the test; returns the wall time in seconds"""
+        self._start = time.perf_counter()
+        self._deadline = self._start + self.duration if self.duration else float('inf')
+
+        if self.rate:
+            # Open loop: Poisson arrivals at a fixed rate regardless of how fast queries complete
+            arrivals = queue.Queue()
+            workers = [threading.Thread(target=self._open_loop_worker, args=(arrivals,), daemon=True)
+                       for _ in range(self.concurrency)]
+            for worker in workers:
+                worker.start()
+            rng = np.random.default_rng(self.seed)
+            next_arrival = self._start
+            while next_arrival < self._deadline and self._take_ticket():
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name = self.names[rng.choice(len(self.names), p=self.probabilities)]
+                arrivals.put((name, next_arrival))
+                next_arrival += rng.exponential(1.0 / self.rate)
+            for _ in workers:
+                arrivals.put(None)
+        else:
+            workers = [threading.Thread(target=self._closed_loop_worker, args=(i,), daemon=True)
+                       for i in range(self.concurrency)]
+            for worker in workers:
+                worker.start()
+
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - self._start
+
+
+def summarize(records, elapsed, warmup):
+    """Latency percentiles, throughput and error rate per query and overall"""
+    df = pd.DataFrame(records)
+    df = df[df['scheduled'] >= warmup]
+    measured = max(elapsed - warmup, 1e-9)
+
+    rows = []
+    groups = [(name, group) for name, group in df.groupby('query')] + [('ALL', df)]
+    for name, group in groups:
+        ok = group[group['error'].isnull()]
+        latencies = ok['latency_ms'].to_numpy()
+        rows.append({
+            'query': name,
+            'requests': len(group),
+            'errors': int(group['error'].notnull().sum()),
+            'error_rate': round(group['error'].notnull().mean(), 4) if len(group) else 0.0,
+            'throughput_qps': round(len(ok) / measured, 2),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+            'p95_ms': round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+            'p99_ms': round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+            'max_ms': round(float(latencies.max()), 2) if len(latencies) else None,
+            'mean_service_ms': round(float(ok['service_ms'].mean()), 2) if len(latencies) else None
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Load test the business queries against PostgreSQL')
+    parser.add_argument('--dsn', default=get_connection_string(DB_CONFIG),
+                        help='SQLAlchemy URL of the database (default: retail_pipeline/config.py DB_CONFIG)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients (and pooled connections)')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Open-loop arrival rate in queries/second (0 = closed loop, back-to-back queries)')
+    parser.add_argument('--duration', type=float, default=60, help='Test length in seconds (0 = until --requests)')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0 = no limit)')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds excluded from the statistics')
+    parser.add_argument('--mix', default='',
+                        help="Weighted query mix, e.g. 'best_customers_by_revenue=3,products_bought_together=1'")
+    parser.add_argument('--pool-size', type=int, default=None, help='Connection pool size (default: --concurrency)')
+    parser.add_argument('--label', default='default', help='Name of the schema/index variant under test')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for query selection and arrivals')
+    parser.add_argument('--output-dir', default='output/loadtest', help='Where results are written')
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        parser.error('set --duration or --requests')
+
+    weights = parse_mix(args.mix)
+    pool_size = args.pool_size or args.concurrency
+    engine = create_engine(args.dsn, pool_size=pool_size, max_overflow=0, pool_pre_ping=True)
+
+    print("=== Query Load Test ===")
+    print(f"Variant: {args.label}")
+    print(f"Concurrency: {args.concurrency}, pool size: {pool_size}")
+    print(f"Arrivals: {'open loop at ' + str(args.rate) + ' q/s' if args.rate else 'closed loop'}")
+    print(f"Mix: {', '.join(f'{n}={w:.2f}' for n, w in weights.items())}")
+
+    test = LoadTest(engine, weights, args.concurrency, args.rate, args.duration, args.requests, args.seed)
+    try:
+        elapsed = test.run()
+    finally:
+        engine.dispose()
+
+    if not test.records:
+        print("\nNo requests completed.")
+        return
+
+    warmup = args.warmup if elapsed > args.warmup * 2 else 0
+    summary = summarize(test.records, elapsed, warmup)
+    print(f"\nElapsed: {elapsed:.1f}s (first {warmup:.0f}s excluded as warm-up)\n")
+    print(summary.to_string(index=False))
+
+    errors = pd.DataFrame(test.records).dropna(subset=['error'])
+    if len(errors):
+        print(f"\nErrors by type (including warm-up):\n{errors.groupby(['query', 'error']).size().to_string()}")
+
+    # Append to one history table so variants and pool sizes can be compared
+    os.makedirs(args.output_dir, exist_ok=True)
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    summary.insert(0, 'run_id', run_id)
+    summary.insert(1, 'label', args.label)
+    summary.insert(2, 'concurrency', args.concurrency)
+    summary.insert(3, 'pool_size', pool_size)
+    summary.insert(4, 'rate', args.rate)
+    history_file = os.path.join(args.output_dir, 'loadtest_history.csv')
+    summary.to_csv(history_file, mode='a', index=False, header=not os.path.exists(history_file))
+
+    result_file = os.path.join(args.output_dir, f'loadtest_{run_id}.json')
+    with open(result_file, 'w') as f:
+        json.dump({
+            'run_id': run_id,
+            'label': args.label,
+            'settings': {k: v for k, v in vars(args).items() if k != 'dsn'},
+            'elapsed_seconds': round(elapsed, 3),
+            'summary': summary.to_dict(orient='records')
+        }, f, indent=2)
+
+    print(f"\nResults saved to: {result_file}")
+    print(f"History appended to: {history_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Online Retail Analysis Pipeline
+Importable stages that pass DataFrames in memory:
+
+    from retail_pipeline import clean, visualize, analyze_customers, load_db, run_queries
+    data = clean('Online Retail.xlsx')
+    visualize(data)
+    rfm, retention = analyze_customers(data)
+    load_db(data)
+    results, answers = run_queries()
+
+Stages are imported on first use, so `import retail_pipeline` stays cheap and
+plotnine or sqlalchemy are only loaded by the stages that need them.
+"""
+
+import importlib
+
+# Public stage function -> submodule that defines it
+_STAGES = {
+    'clean': 'cleaning',
+    'visualize': 'visualization',
+    'analyze_customers': 'customers',
+    'load_db': 'database',
+    'run_queries': 'queries',
+}
+
+__all__ = list(_STAGES)
+
+
+def __getattr__(name):
+    if name in _STAGES:
+        module = importlib.import_module(f'.{_STAGES[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
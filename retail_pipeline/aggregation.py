@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Sales Aggregation Cube
+Aggregates the cleaned dataset once into a compact multi-dimensional cube
+(plus a product-level rollup) that the charts and other consumers derive from
+"""
+
+import pandas as pd
+import os
+
+from .config import CLEANED_FILE
+
+AGGREGATES_DIR = 'output/aggregates'
+CUBE_FILE = os.path.join(AGGREGATES_DIR, 'sales_cube.csv')
+PRODUCT_ROLLUP_FILE = os.path.join(AGGREGATES_DIR, 'product_rollup.csv')
+
+CUBE_DIMENSIONS = ['YearMonth', 'DayOfWeek', 'TimeOfDay', 'Hour', 'Country']
+# An invoice has a single timestamp and country, so it falls in exactly one cube cell
+# and Invoices can be summed across cells like the other measures
+CUBE_MEASURES = ['TotalRevenue', 'Quantity', 'Lines', 'Invoices']
+
+
+def build_sales_cube(data):
+    """Single groupby pass: (YearMonth, DayOfWeek, TimeOfDay, Hour, Country) -> measures"""
+    keys = [data['InvoiceDate'].dt.to_period('M').astype(str).rename('YearMonth'),
+            data['DayOfWeek'].astype(str), data['TimeOfDay'], data['Hour'], data['Country']]
+    cube = data.groupby(keys, sort=False).agg(
+        TotalRevenue=('TotalRevenue', 'sum'),
+        Quantity=('Quantity', 'sum'),
+        Lines=('InvoiceNo', 'size'),
+        Invoices=('InvoiceNo', 'nunique'))
+    return cube.reset_index()
+
+
+def build_product_rollup(data):
+    """Revenue, quantity and invoice count per (StockCode, Description_imputed)"""
+    products = data.groupby(['StockCode', 'Description_imputed'], sort=False).agg(
+        TotalRevenue=('TotalRevenue', 'sum'),
+        Quantity=('Quantity', 'sum'),
+        Invoices=('InvoiceNo', 'nunique'))
+    return products.reset_index()
+
+
+def rollup(cube, dimensions, measures=('TotalRevenue',)):
+    """Sum the cube over every dimension not listed, e.g. rollup(cube, ['Country'])"""
+    dimensions = [dimensions] if isinstance(dimensions, str) else list(dimensions)
+    return cube.groupby(dimensions, sort=False)[list(measures)].sum().reset_index()
+
+
+def save_aggregates(cube, products, cube_file=CUBE_FILE, product_file=PRODUCT_ROLLUP_FILE):
+    """Persist the cube and product rollup so other consumers can reuse them"""
+    os.makedirs(os.path.dirname(cube_file), exist_ok=True)
+    cube.to_csv(cube_file, index=False)
+    products.to_csv(product_file, index=False)
+
+
+def load_aggregates(cube_file=CUBE_FILE, product_file=PRODUCT_ROLLUP_FILE):
+    """Read a persisted cube and product rollup"""
+    cube = pd.read_csv(cube_file, dtype={'YearMonth': str, 'DayOfWeek': str, 'TimeOfDay': str, 'Country': str})
+    products = pd.read_csv(product_file, dtype={'StockCode': str, 'Description_imputed': str})
+    return cube, products
+
+
+def aggregates_are_fresh(source_file=CLEANED_FILE, cube_file=CUBE_FILE, product_file=PRODUCT_ROLLUP_FILE):
+    """True when both aggregate files exist and are newer than the cleaned dataset"""
+    if not (os.path.exists(cube_file) and os.path.exists(product_file)):
+        return False
+    if not os.path.exists(source_file):
+        return True
+    return min(os.path.getmtime(cube_file), os.path.getmtime(product_file)) >= os.path.getmtime(source_file)
+
+
+def load_or_build_aggregates(data=None, source_file=CLEANED_FILE, from_source=False):
+    """Aggregates of data, or of source_file reusing the persisted aggregates while they are current
+
+    The persisted files describe source_file, so a DataFrame passed in is
+    aggregated as given unless from_source says it was just read from
+    source_file; nothing is read from or written to disk for it.
+    """
+    if data is not None and not from_source:
+        return build_sales_cube(data), build_product_rollup(data)
+    if aggregates_are_fresh(source_file):
+        return load_aggregates()
+    if data is None:
+        data = pd.read_csv(source_file, dtype={'InvoiceNo': str, 'StockCode': str}, parse_dates=['InvoiceDate'])
+    cube = build_sales_cube(data)
+    products = build_product_rollup(data)
+    save_aggregates(cube, products)
+    return cube, products
+
+
+def main():
+    """Build the aggregates from the cleaned dataset"""
+    print("Loading cleaned dataset...")
+    data = pd.read_csv(CLEANED_FILE, dtype={'InvoiceNo': str, 'StockCode': str}, parse_dates=['InvoiceDate'])
+    print(f"Dataset shape: {data.shape}")
+
+    cube = build_sales_cube(data)
+    products = build_product_rollup(data)
+    save_aggregates(cube, products)
+
+    print(f"Sales cube: {len(cube):,} cells ({len(data) / max(len(cube), 1):.0f}x smaller than the data)")
+    print(f"Product rollup: {len(products):,} products")
+    print(f"Saved: {CUBE_FILE}")
+    print(f"Saved: {PRODUCT_ROLLUP_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Pre-Binning Helpers for Distribution Plots
+Reduces raw values to histogram bins, box-plot statistics, 2D density
+rasters and KDE curves with NumPy, so plotnine renders a fixed number of
+shapes however many rows the dataset has
+"""
+
+import pandas as pd
+import numpy as np
+
+
+def histogram_bins(values, bins=50, value_range=None):
+    """Bin counts with one row per bar: center, left, right, width, count"""
+    values = np.asarray(values, dtype=float)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins, range=value_range)
+    return pd.DataFrame({'center': (edges[:-1] + edges[1:]) / 2, 'left': edges[:-1], 'right': edges[1:],
+                         'width': np.diff(edges), 'count': counts})
+
+
+def _sorted_groups(values, groups):
+    """Sort values within groups once; yields (group, sorted values of that group)"""
+    values = np.asarray(values, dtype=float)
+    codes, labels = pd.factorize(pd.Series(groups), sort=True)
+    keep = np.isfinite(values) & (codes >= 0)
+    values, codes = values[keep], codes[keep]
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    bounds = np.searchsorted(codes, np.arange(len(labels) + 1))
+    for i, label in enumerate(labels):
+        yield label, values[bounds[i]:bounds[i + 1]]
+
+
+def box_stats(values, groups):
+    """Per-group box-plot statistics (Tukey whiskers at 1.5 IQR, outliers summarised as a count)
+
+    Columns match plotnine's geom_boxplot(stat='identity') aesthetics:
+    group, ymin, lower, middle, upper, ymax, plus n and outliers.
+    """
+    rows = []
+    for label, sorted_values in _sorted_groups(values, groups):
+        if len(sorted_values) == 0:
+            continue
+        q1, median, q3 = np.percentile(sorted_values, [25, 50, 75])
+        iqr = q3 - q1
+        # Whiskers end at the most extreme values still inside the 1.5 IQR fences
+        low = sorted_values[np.searchsorted(sorted_values, q1 - 1.5 * iqr, side='left')]
+        high = sorted_values[np.searchsorted(sorted_values, q3 + 1.5 * iqr, side='right') - 1]
+        outliers = int(np.sum(sorted_values < low) + np.sum(sorted_values > high))
+        rows.append({'group': label, 'ymin': low, 'lower': q1, 'middle': median, 'upper': q3,
+                     'ymax': high, 'n': len(sorted_values), 'outliers': outliers})
+    return pd.DataFrame(rows)
+
+
+def density_grid(x, y, bins=100, x_range=None, y_range=None):
+    """2D raster of point counts for scatter data: cell center, size and count (empty cells dropped)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    value_range = None if x_range is None and y_range is None else [
+        x_range or (x[keep].min(), x[keep].max()), y_range or (y[keep].min(), y[keep].max())]
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins, range=value_range)
+    xi, yi = np.nonzero(counts)
+    return pd.DataFrame({
+        'x': (x_edges[xi] + x_edges[xi + 1]) / 2,
+        'y': (y_edges[yi] + y_edges[yi + 1]) / 2,
+        'width': x_edges[xi + 1] - x_edges[xi],
+        'height': y_edges[yi + 1] - y_edges[yi],
+        'count': counts[xi, yi].astype(int)
+    })
+
+
+def scott_bandwidth(values):
+    """Scott's rule of thumb bandwidth (the default of geom_density and scipy's gaussian_kde)"""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return 1.0
+    return 1.06 * values.std(ddof=1) * len(values) ** (-1 / 5) or 1.0
+
+
+def kde_grid(values, grid_size=512, bandwidth=None, value_range=None):
+    """Gaussian KDE evaluated on an even grid
+
+    Values are linearly binned onto the grid and convolved with the kernel,
+    which costs O(n + grid_size log grid_size) instead of O(n * grid_size).
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    bandwidth = bandwidth or scott_bandwidth(values)
+    low, high = value_range or (values.min() - 3 * bandwidth, values.max() + 3 * bandwidth)
+    grid = np.linspace(low, high, grid_size)
+    step = grid[1] - grid[0]
+
+    # Linear binning: split each value's weight between its two neighbouring grid points
+    values = values[(values >= low) & (values <= high)]
+    position = (values - low) / step
+    left = np.clip(np.floor(position).astype(int), 0, grid_size - 2)
+    fraction = position - left
+    weights = np.bincount(left, weights=1 - fraction, minlength=grid_size) + \
+        np.bincount(left + 1, weights=fraction, minlength=grid_size)
+
+    # Convolve with the Gaussian kernel via FFT, zero-padded to avoid wrap-around
+    half_width = min(int(np.ceil(4 * bandwidth / step)), grid_size - 1)
+    offsets = np.arange(-half_width, half_width + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = grid_size + len(kernel) - 1
+    smoothed = np.fft.irfft(np.fft.rfft(weights, size) * np.fft.rfft(kernel, size), size)
+    density = smoothed[half_width:half_width + grid_size].clip(min=0)
+    total = weights.sum()
+    return pd.DataFrame({'x': grid, 'density': density / total if total else density})
+
+
+def group_kde(values, groups, grid_size=256, value_range=None):
+    """KDE per group on a shared grid (for violin plots): group, y, density
+
+    Like geom_violin, each curve is trimmed to the range of its own group's values.
+    """
+    values = np.asarray(values, dtype=float)
+    finite = values[np.isfinite(values)]
+    value_range = value_range or (finite.min(), finite.max())
+    frames = []
+    for label, group_values in _sorted_groups(values, groups):
+        if len(group_values) < 2:
+            continue
+        kde = kde_grid(group_values, grid_size=grid_size, value_range=value_range)
+        kde = kde[(kde['x'] >= group_values[0]) & (kde['x'] <= group_values[-1])]
+        frames.append(pd.DataFrame({'group': label, 'y': kde['x'], 'density': kde['density']}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['group', 'y', 'density'])
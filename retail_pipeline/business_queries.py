@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Business Query Definitions
+SQL workload shared by the queries stage, the benchmark suite and the load tester
+"""
+
+
+BEST_CUSTOMERS_BY_REVENUE = """
+    SELECT 
+        customer_id_imputed AS customer_id,
+        COUNT(DISTINCT invoice_no) AS total_orders,
+        SUM(total_revenue) AS total_revenue,
+        AVG(total_revenue) AS avg_order_value,
+        MAX(invoice_date) AS last_purchase_date
+    FROM online_retail
+    WHERE customer_id_imputed > 0
+    GROUP BY customer_id_imputed
+    ORDER BY total_revenue DESC
+    LIMIT 10;
+    """
+
+BEST_CUSTOMERS_BY_FREQUENCY = """
+    SELECT 
+        customer_id_imputed AS customer_id,
+        COUNT(DISTINCT invoice_no) AS total_orders,
+        SUM(total_revenue) AS total_revenue,
+        AVG(total_revenue) AS avg_order_value,
+        MAX(invoice_date) AS last_purchase_date
+    FROM online_retail
+    WHERE customer_id_imputed > 0
+    GROUP BY customer_id_imputed
+    ORDER BY total_orders DESC
+    LIMIT 10;
+    """
+
+SALES_BY_TIME_OF_DAY = """
+    SELECT 
+        time_of_day,
+        COUNT(DISTINCT invoice_no) AS number_of_transactions,
+        SUM(total_revenue) AS total_revenue,
+        AVG(total_revenue) AS avg_revenue_per_transaction,
+        SUM(quantity) AS total_quantity_sold
+    FROM online_retail
+    GROUP BY time_of_day
+    ORDER BY 
+        CASE time_of_day
+            WHEN 'Morning' THEN 1
+            WHEN 'Afternoon' THEN 2
+            WHEN 'Evening' THEN 3
+            WHEN 'Night' THEN 4
+        END;
+    """
+
+SALES_BY_DAY_OF_WEEK = """
+    SELECT 
+        day_of_week,
+        COUNT(DISTINCT invoice_no) AS number_of_transactions,
+        SUM(total_revenue) AS total_revenue,
+        AVG(total_revenue) AS avg_revenue_per_transaction,
+        SUM(quantity) AS total_quantity_sold
+    FROM online_retail
+    GROUP BY day_of_week
+    ORDER BY 
+        CASE day_of_week
+            WHEN 'Monday' THEN 1
+            WHEN 'Tuesday' THEN 2
+            WHEN 'Wednesday' THEN 3
+            WHEN 'Thursday' THEN 4
+            WHEN 'Friday' THEN 5
+            WHEN 'Saturday' THEN 6
+            WHEN 'Sunday' THEN 7
+        END;
+    """
+
+SALES_BY_HOUR = """
+    SELECT 
+        hour,
+        COUNT(DISTINCT invoice_no) AS number_of_transactions,
+        SUM(total_revenue) AS total_revenue,
+        AVG(total_revenue) AS avg_revenue_per_transaction
+    FROM online_retail
+    GROUP BY hour
+    ORDER BY total_revenue DESC
+    LIMIT 10;
+    """
+
+PRODUCTS_BOUGHT_TOGETHER = """
+    WITH invoice_products AS (
+        SELECT DISTINCT
+            invoice_no,
+            stock_code,
+            description_imputed
+        FROM online_retail
+        WHERE customer_id_imputed > 0
+    ),
+    product_pairs AS (
+        SELECT 
+            ip1.stock_code AS product1_code,
+            ip1.description_imputed AS product1_desc,
+            ip2.stock_code AS product2_code,
+            ip2.description_imputed AS product2_desc,
+            COUNT(DISTINCT ip1.invoice_no) AS co_occurrence_count
+        FROM invoice_products ip1
+        INNER JOIN invoice_products ip2 
+            ON ip1.invoice_no = ip2.invoice_no
+            AND ip1.stock_code < ip2.stock_code
+        GROUP BY 
+            ip1.stock_code, ip1.description_imputed,
+            ip2.stock_code, ip2.description_imputed
+        HAVING COUNT(DISTINCT ip1.invoice_no) >= 5
+    )
+    SELECT 
+        product1_code,
+        LEFT(product1_desc, 40) AS product1_description,
+        product2_code,
+        LEFT(product2_desc, 40) AS product2_description,
+        co_occurrence_count
+    FROM product_pairs
+    ORDER BY co_occurrence_count DESC
+    LIMIT 20;
+    """
+
+SUMMARY_STATISTICS = """
+    SELECT 
+        COUNT(*) AS total_transactions,
+        COUNT(DISTINCT invoice_no) AS unique_invoices,
+        COUNT(DISTINCT customer_id_imputed) AS unique_customers,
+        COUNT(DISTINCT stock_code) AS unique_products,
+        SUM(total_revenue) AS total_revenue,
+        SUM(net_revenue) AS total_net_revenue,
+        AVG(total_revenue) AS avg_revenue_per_transaction,
+        SUM(quantity) AS total_quantity_sold,
+        AVG(quantity) AS avg_quantity_per_transaction
+    FROM online_retail
+    WHERE customer_id_imputed > 0;
+    """
+
+MOST_RETURNED_PRODUCTS = """
+    SELECT 
+        stock_code,
+        LEFT(description_imputed, 40) AS description,
+        SUM(quantity) AS quantity_sold,
+        SUM(returned_quantity) AS quantity_returned,
+        SUM(total_revenue) AS total_revenue,
+        SUM(total_revenue - net_revenue) AS returned_revenue,
+        SUM(total_revenue - net_revenue) / NULLIF(SUM(total_revenue), 0) AS return_rate
+    FROM online_retail
+    GROUP BY stock_code, description_imputed
+    HAVING SUM(returned_quantity) > 0
+    ORDER BY returned_revenue DESC
+    LIMIT 10;
+    """
+
+# Ordered (name, title, sql, output file) entries, in the order the queries stage runs them
+QUERIES = [
+    ('best_customers_by_revenue', 'Best Customers by Revenue (Top 10)', BEST_CUSTOMERS_BY_REVENUE, '1_best_customers_by_revenue.csv'),
+    ('best_customers_by_frequency', 'Best Customers by Frequency (Top 10)', BEST_CUSTOMERS_BY_FREQUENCY, '2_best_customers_by_frequency.csv'),
+    ('sales_by_time_of_day', 'Sales Performance by Time of Day', SALES_BY_TIME_OF_DAY, '3_sales_by_time_of_day.csv'),
+    ('sales_by_day_of_week', 'Sales Performance by Day of Week', SALES_BY_DAY_OF_WEEK, '4_sales_by_day_of_week.csv'),
+    ('sales_by_hour', 'Sales Performance by Hour of Day (Top 10)', SALES_BY_HOUR, '5_sales_by_hour.csv'),
+    ('products_bought_together', 'Products Frequently Bought Together (Top 20 Pairs)', PRODUCTS_BOUGHT_TOGETHER, '6_products_bought_together.csv'),
+    ('summary_statistics', 'Overall Summary Statistics', SUMMARY_STATISTICS, '7_summary_statistics.csv'),
+    ('most_returned_products', 'Most Returned Products (Top 10 by Returned Revenue)', MOST_RETURNED_PRODUCTS, '8_most_returned_products.csv'),
+]
+
+
+def get_query(name):
+    """Look up a query entry by name"""
+    for entry in QUERIES:
+        if entry[0] == name:
+            return entry
+    raise KeyError(f"Unknown query: {name}. Available: {', '.join(q[0] for q in QUERIES)}")
+
+
+def build_answers(results):
+    """Summarize query results (query name -> DataFrame) into the business answers document"""
+    best_customer_revenue = results['best_customers_by_revenue'].iloc[0]
+    best_customer_freq = results['best_customers_by_frequency'].iloc[0]
+
+    by_time = results['sales_by_time_of_day']
+    by_day = results['sales_by_day_of_week']
+    best_time = by_time.loc[by_time['total_revenue'].idxmax()]
+    best_day = by_day.loc[by_day['total_revenue'].idxmax()]
+    best_hour_row = results['sales_by_hour'].iloc[0]
+
+    pairs = results['products_bought_together']
+    top_pair = pairs.iloc[0] if len(pairs) > 0 else None
+
+    summary = results['summary_statistics'].iloc[0]
+    returned = results['most_returned_products']
+    top_returned = returned.iloc[0] if len(returned) > 0 else None
+
+    return {
+        "question_1_best_customers": {
+            "by_revenue": {
+                "customer_id": int(best_customer_revenue['customer_id']),
+                "total_revenue": float(best_customer_revenue['total_revenue']),
+                "total_orders": int(best_customer_revenue['total_orders'])
+            },
+            "by_frequency": {
+                "customer_id": int(best_customer_freq['customer_id']),
+                "total_orders": int(best_customer_freq['total_orders']),
+                "total_revenue": float(best_customer_freq['total_revenue'])
+            }
+        },
+        "question_2_best_time_for_sales": {
+            "time_of_day": str(best_time['time_of_day']),
+            "total_revenue": float(best_time['total_revenue']),
+            "day_of_week": str(best_day['day_of_week']),
+            "day_total_revenue": float(best_day['total_revenue']),
+            "hour_of_day": int(best_hour_row['hour']),
+            "hour_total_revenue": float(best_hour_row['total_revenue'])
+        },
+        "question_3_products_bought_together": {
+            "top_pair": {
+                "product1": f"{top_pair['product1_code']} - {top_pair['product1_description']}",
+                "product2": f"{top_pair['product2_code']} - {top_pair['product2_description']}",
+                "co_occurrence_count": int(top_pair['co_occurrence_count'])
+            } if top_pair is not None else "No significant pairs found"
+        },
+        "question_4_returns": {
+            "total_revenue": float(summary['total_revenue']),
+            "net_revenue": float(summary['total_net_revenue']),
+            "returned_share": float(1 - summary['total_net_revenue'] / summary['total_revenue']),
+            "most_returned_product": {
+                "product": f"{top_returned['stock_code']} - {top_returned['description']}",
+                "returned_revenue": float(top_returned['returned_revenue']),
+                "return_rate": float(top_returned['return_rate'])
+            } if top_returned is not None else "No matched returns"
+        }
+    }
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Product Canonicalization
+Picks one description per StockCode and merges stock codes whose descriptions
+are near-duplicates, using a character-trigram MinHash index with LSH banding
+so only likely pairs are compared instead of every pair of products
+"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+CACHE_DIR = 'output/cache'
+CANONICAL_FILE = os.path.join(CACHE_DIR, 'product_canonical.csv')
+
+# Trigram Jaccard similarity at which two product descriptions are the same product
+SIMILARITY_THRESHOLD = 0.8
+# 64 hash functions in 16 bands of 4: pairs at the threshold share a band with probability > 0.99
+NUM_PERM = 64
+BANDS = 16
+SEED = 42
+
+# Largest Mersenne prime below 2^31, so (a * id + b) stays within int64
+_PRIME = (1 << 31) - 1
+
+
+def normalize_description(descriptions):
+    """Upper case, with runs of punctuation and whitespace collapsed to one space"""
+    return descriptions.str.upper().str.replace(r'[^A-Z0-9]+', ' ', regex=True).str.strip()
+
+
+def trigrams(text):
+    """Distinct character trigrams of a space-padded text"""
+    padded = f' {text} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def minhash_signatures(shingles, num_perm=NUM_PERM, seed=SEED):
+    """(n, num_perm) MinHash signatures of a list of non-empty trigram sets"""
+    rows = np.repeat(np.arange(len(shingles)), [len(s) for s in shingles])
+    ids, _ = pd.factorize(np.fromiter((g for s in shingles for g in s), dtype=object, count=len(rows)))
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=num_perm)
+    b = rng.integers(0, _PRIME, size=num_perm)
+    signatures = np.empty((len(shingles), num_perm), dtype=np.int64)
+    for k in range(num_perm):
+        # Minimum hash of each text's trigram ids under one random permutation
+        signatures[:, k] = np.minimum.reduceat((a[k] * ids + b[k]) % _PRIME, starts)
+    return signatures
+
+
+def candidate_pairs(signatures, bands=BANDS):
+    """Index pairs that agree on every row of at least one band"""
+    rows_per_band = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        keys = pd.util.hash_pandas_object(
+            pd.DataFrame(signatures[:, band * rows_per_band:(band + 1) * rows_per_band]), index=False).to_numpy()
+        order = np.argsort(keys, kind='stable')
+        boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+        for bucket in np.split(order, boundaries):
+            if len(bucket) > 1:
+                bucket = np.sort(bucket)
+                pairs.update((int(bucket[i]), int(bucket[j]))
+                             for i in range(len(bucket)) for j in range(i + 1, len(bucket)))
+    return pairs
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+
+def near_duplicate_groups(texts, threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """Group label per text: texts linked by verified near-duplicate pairs share a label
+
+    Candidates from the LSH index are confirmed with the exact trigram Jaccard
+    similarity. Numbers must match exactly, so '50'S CHRISTMAS' and
+    '60'S CHRISTMAS' or 'SET OF 3' and 'SET OF 6' stay apart.
+    """
+    shingles = [trigrams(t) for t in texts]
+    numbers = [re.findall(r'\d+', t) for t in texts]
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in candidate_pairs(minhash_signatures(shingles, num_perm), bands):
+        if numbers[i] == numbers[j] and jaccard(shingles[i], shingles[j]) >= threshold:
+            parent[find(j)] = find(i)
+    return np.array([find(i) for i in range(len(texts))])
+
+
+def description_counts(data):
+    """Lines per (StockCode, Description); the input of the mapping and of its fingerprint"""
+    described = data.loc[data['Description'].notna(), ['StockCode', 'Description']]
+    return described.groupby(['StockCode', 'Description']).size().rename('lines').reset_index()
+
+
+def build_canonical_mapping(counts, threshold=SIMILARITY_THRESHOLD):
+    """StockCode -> CanonicalStockCode, CanonicalDescription
+
+    Each code's most frequent description represents it. Codes whose
+    representative descriptions are near-duplicates are merged into the code
+    with the most lines, described by the cluster's most frequent description.
+    """
+    ranked = counts.sort_values(['lines', 'StockCode', 'Description'], ascending=[False, True, True])
+    codes = ranked.drop_duplicates('StockCode')[['StockCode', 'Description']].reset_index(drop=True)
+    codes['lines'] = codes['StockCode'].map(counts.groupby('StockCode')['lines'].sum())
+    codes['text'] = normalize_description(codes['Description'])
+
+    codes['group'] = -1
+    comparable = codes['text'].str.len() > 0
+    codes.loc[comparable, 'group'] = near_duplicate_groups(codes.loc[comparable, 'text'].tolist(), threshold)
+    # Codes without comparable text form their own group
+    loners = ~comparable
+    codes.loc[loners, 'group'] = np.arange(loners.sum()) + len(codes)
+
+    leaders = codes.sort_values(['lines', 'StockCode'], ascending=[False, True]).drop_duplicates('group')
+    codes['CanonicalStockCode'] = codes['group'].map(leaders.set_index('group')['StockCode'])
+
+    clustered = ranked.merge(codes[['StockCode', 'group']], on='StockCode')
+    descriptions = clustered.groupby(['group', 'Description'], as_index=False)['lines'].sum() \
+        .sort_values(['lines', 'Description'], ascending=[False, True]).drop_duplicates('group')
+    codes['CanonicalDescription'] = codes['group'].map(descriptions.set_index('group')['Description'])
+    return codes[['StockCode', 'CanonicalStockCode', 'CanonicalDescription', 'lines']] \
+        .sort_values('StockCode').reset_index(drop=True)
+
+
+def mapping_fingerprint(counts, threshold=SIMILARITY_THRESHOLD):
+    """Digest of the description counts and the matching parameters"""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(counts, index=False).to_numpy().tobytes())
+    digest.update(f'{threshold}:{NUM_PERM}:{BANDS}:{SEED}'.encode())
+    return digest.hexdigest()
+
+
+def _metadata_file(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def load_or_build_canonical_mapping(data, path=CANONICAL_FILE, threshold=SIMILARITY_THRESHOLD):
+    """Reuse the cached mapping when the descriptions it was built from are unchanged
+
+    Returns (mapping, True if it was read from the cache).
+    """
+    counts = description_counts(data)
+    fingerprint = mapping_fingerprint(counts, threshold)
+    if os.path.exists(path) and os.path.exists(_metadata_file(path)):
+        with open(_metadata_file(path)) as f:
+            if json.load(f).get('fingerprint') == fingerprint:
+                return pd.read_csv(path, dtype={'StockCode': str, 'CanonicalStockCode': str,
+                                                'CanonicalDescription': str}), True
+
+    mapping = build_canonical_mapping(counts, threshold)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mapping.to_csv(path, index=False)
+    with open(_metadata_file(path), 'w') as f:
+        json.dump({
+            'fingerprint': fingerprint,
+            'threshold': threshold,
+            'codes': len(mapping),
+            'canonical_codes': int(mapping['CanonicalStockCode'].nunique()),
+            'built_at': datetime.now().isoformat(timespec='seconds')
+        }, f, indent=2)
+    return mapping, False
+
+
+def apply_canonical_mapping(data, mapping):
+    """Rewrite StockCode and Description_imputed in place, keeping the original code in StockCodeOriginal"""
+    codes = mapping.set_index('StockCode')
+    data['StockCodeOriginal'] = data['StockCode']
+    data['StockCode'] = data['StockCodeOriginal'].map(codes['CanonicalStockCode']).fillna(data['StockCodeOriginal'])
+    data['Description_imputed'] = data['StockCodeOriginal'].map(codes['CanonicalDescription']) \
+        .fillna(data['Description_imputed'])
+    return data
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Data Cleaning Stage for Online Retail Dataset
+Applies various cleaning techniques based on provided examples
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+
+from .aggregation import CUBE_FILE, build_product_rollup, build_sales_cube, save_aggregates
+from .canonical import CANONICAL_FILE, apply_canonical_mapping, load_or_build_canonical_mapping
+from .config import CLEANED_FILE, CLEANING_SUMMARY_FILE, OUTPUT_DIR, RAW_FILE
+from .dedup import DEDUP_MEMORY_BUDGET, StreamingDeduplicator
+from .ingestion import read_raw
+from .instrumentation import StageTrace
+from .returns import RETURN_LINKS_FILE, RETURNS_DIR, add_net_columns, cancellation_lines, match_returns
+from .time_index import TIME_INDEX_FILE, TimeIndex
+
+
+def categorize_hour(hour):
+    """Time of day category for an hour of the day"""
+    if 6 <= hour < 12:
+        return 'Morning'
+    elif 12 <= hour < 17:
+        return 'Afternoon'
+    elif 17 <= hour < 21:
+        return 'Evening'
+    else:
+        return 'Night'
+
+
+def clean(source=RAW_FILE, output_file=CLEANED_FILE, workers=None, dedup_memory=DEDUP_MEMORY_BUDGET):
+    """Clean the raw dataset and return the cleaned DataFrame
+
+    source is a .xlsx, .csv or .csv.gz file, a directory of them or a glob
+    pattern; files are parsed by up to `workers` processes. Exact duplicate
+    rows are dropped while loading, keeping at most dedup_memory bytes of row
+    digests in memory. The cleaned data is also written to output_file unless
+    it is None.
+    """
+    # Create output directory if it doesn't exist
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    trace = StageTrace('cleaning')
+
+    with trace.span('load_raw') as span:
+        print(f"Loading dataset: {source}")
+        # Load the dataset (one file, a directory or a glob of monthly extracts, parsed in parallel)
+        # and drop exact duplicate line items, including repeats across files
+        with StreamingDeduplicator(dedup_memory) as deduplicator:
+            data = read_raw(source, workers, deduplicator)
+        span['rows'] = len(data)
+        span['duplicates'] = deduplicator.duplicates
+        span['spills'] = deduplicator.spills
+        print(f"Exact duplicate rows removed: {deduplicator.duplicates:,}")
+
+    print(f"Initial dataset shape: {data.shape}")
+    print(f"Initial missing values:\n{data.isnull().sum()}")
+
+    # Save initial statistics
+    initial_stats = {
+        'total_rows': data.shape[0] + deduplicator.duplicates,
+        'duplicates': deduplicator.duplicates,
+        'missing_description': data['Description'].isnull().sum(),
+        'missing_customerid': data['CustomerID'].isnull().sum(),
+        'negative_quantities': (data['Quantity'] < 0).sum(),
+        'invalid_prices': (data['UnitPrice'] <= 0).sum(),
+        'cancelled_invoices': data['InvoiceNo'].astype(str).str.startswith('C').sum()
+    }
+
+    # 1. Clean Incorrect Formats - Clean Description column
+    with trace.span('clean_description', rows=len(data)):
+        print("\n=== Cleaning Description Column ===")
+        initial_description_count = data['Description'].notna().sum()
+
+        # Remove leading/trailing whitespace and convert to string
+        data['Description'] = data['Description'].astype(str).str.strip()
+
+        # Replace common variations (similar to the pet example)
+        # Replace empty strings and 'nan' with actual NaN
+        data['Description'] = data['Description'].replace(['', 'nan', 'NaN'], np.nan)
+
+        final_description_count = data['Description'].notna().sum()
+        print(f"Descriptions before cleaning: {initial_description_count}")
+        print(f"Descriptions after cleaning: {final_description_count}")
+
+    # 2. Handle Missing Data - Identify missing values
+    with trace.span('identify_missing', rows=len(data)):
+        print("\n=== Identifying Missing Data ===")
+        missing_description = data['Description'].isnull().sum()
+        missing_customerid = data['CustomerID'].isnull().sum()
+        total_rows = data.shape[0]
+
+        percentage_missing_description = (missing_description / total_rows) * 100
+        percentage_missing_customerid = (missing_customerid / total_rows) * 100
+
+        print(f"Missing Description values: {missing_description} ({percentage_missing_description:.2f}%)")
+        print(f"Missing CustomerID values: {missing_customerid} ({percentage_missing_customerid:.2f}%)")
+
+    # 3. Impute Missing Values from Internal Data
+    with trace.span('impute_missing', rows=len(data)):
+        print("\n=== Imputing Missing CustomerID ===")
+        # For CustomerID, we'll use mode (most frequent customer ID) for imputation
+        # But first, let's check if we should drop rows with missing CustomerID for analysis
+        # For now, we'll create a flag and keep them for reference
+
+        # Create a flag for missing CustomerID
+        data['has_customerid'] = data['CustomerID'].notna().astype(int)
+
+        # For rows with missing CustomerID, we could impute with 0 or drop them
+        # Since CustomerID is critical for customer analysis, we'll keep a separate dataset
+        # For now, we'll impute with 0 (representing unknown customers)
+        data['CustomerID_imputed'] = data['CustomerID'].fillna(0).astype(int)
+
+        # For Description, we'll impute with 'UNKNOWN' since it's categorical
+        data['Description_imputed'] = data['Description'].fillna('UNKNOWN')
+
+    # 4. Remove Invalid Records
+    with trace.span('remove_invalid', rows=len(data)):
+        print("\n=== Removing Invalid Records ===")
+        # Remove cancelled invoices (InvoiceNo starting with 'C')
+        data_cleaned = data[~data['InvoiceNo'].astype(str).str.startswith('C')].copy()
+
+        # Remove rows with negative or zero quantities (returns/cancellations)
+        data_cleaned = data_cleaned[data_cleaned['Quantity'] > 0].copy()
+
+        # Remove rows with zero or negative prices
+        data_cleaned = data_cleaned[data_cleaned['UnitPrice'] > 0].copy()
+
+        print(f"Rows after removing cancelled invoices: {data_cleaned.shape[0]}")
+        print(f"Rows removed: {data.shape[0] - data_cleaned.shape[0]}")
+
+    # 4a. Link cancellations to the purchases they return
+    with trace.span('match_returns', rows=len(data)) as span:
+        print("\n=== Matching Returns to Purchases ===")
+        cancellations = cancellation_lines(data)
+        returned_quantity, return_links, matched_quantity = match_returns(data_cleaned, cancellations)
+        data_cleaned = add_net_columns(data_cleaned, returned_quantity)
+
+        os.makedirs(RETURNS_DIR, exist_ok=True)
+        return_links.to_csv(RETURN_LINKS_FILE, index=False)
+        span['links'] = len(return_links)
+
+        cancelled_quantity = int(-cancellations['Quantity'].sum())
+        returned_matched = int(matched_quantity.sum())
+        print(f"Cancellation lines: {len(cancellations)} ({cancelled_quantity} units)")
+        print(f"Units matched to an earlier purchase: {returned_matched} "
+              f"({returned_matched / max(cancelled_quantity, 1):.1%}), in {len(return_links)} links")
+        print(f"Returned revenue: {return_links['ReturnedRevenue'].sum():,.2f}")
+        print(f"Return links saved to: {RETURN_LINKS_FILE}")
+
+    # 5. Create Derived Variables
+    with trace.span('derive_variables', rows=len(data_cleaned)):
+        print("\n=== Creating Derived Variables ===")
+        # Calculate total revenue per transaction
+        data_cleaned['TotalRevenue'] = data_cleaned['Quantity'] * data_cleaned['UnitPrice']
+
+        # Extract date components
+        data_cleaned['InvoiceDate'] = pd.to_datetime(data_cleaned['InvoiceDate'])
+        data_cleaned['Year'] = data_cleaned['InvoiceDate'].dt.year
+        data_cleaned['Month'] = data_cleaned['InvoiceDate'].dt.month
+        data_cleaned['Day'] = data_cleaned['InvoiceDate'].dt.day
+        data_cleaned['DayOfWeek'] = data_cleaned['InvoiceDate'].dt.day_name()
+        data_cleaned['Hour'] = data_cleaned['InvoiceDate'].dt.hour
+        data_cleaned['Date'] = data_cleaned['InvoiceDate'].dt.date
+
+        # Create a categorical variable for time of day
+        with trace.span('time_of_day_apply', rows=len(data_cleaned)):
+            data_cleaned['TimeOfDay'] = data_cleaned['Hour'].apply(categorize_hour)
+
+        # Create a boolean variable for high-value transactions (above median)
+        median_revenue = data_cleaned['TotalRevenue'].median()
+        data_cleaned['HighValueTransaction'] = (data_cleaned['TotalRevenue'] > median_revenue).astype(int)
+
+    # 6. Identify Extreme Data Values
+    with trace.span('extreme_values', rows=len(data_cleaned)):
+        print("\n=== Identifying Extreme Data Values ===")
+        # Check for extreme quantities
+        qty_5th = data_cleaned['Quantity'].quantile(0.05)
+        qty_95th = data_cleaned['Quantity'].quantile(0.95)
+        qty_99th = data_cleaned['Quantity'].quantile(0.99)
+
+        price_5th = data_cleaned['UnitPrice'].quantile(0.05)
+        price_95th = data_cleaned['UnitPrice'].quantile(0.95)
+        price_99th = data_cleaned['UnitPrice'].quantile(0.99)
+
+        revenue_5th = data_cleaned['TotalRevenue'].quantile(0.05)
+        revenue_95th = data_cleaned['TotalRevenue'].quantile(0.95)
+        revenue_99th = data_cleaned['TotalRevenue'].quantile(0.99)
+
+        print(f"Quantity - 5th percentile: {qty_5th}, 95th percentile: {qty_95th}, 99th percentile: {qty_99th}")
+        print(f"UnitPrice - 5th percentile: {price_5th}, 95th percentile: {price_95th}, 99th percentile: {price_99th}")
+        print(f"TotalRevenue - 5th percentile: {revenue_5th}, 95th percentile: {revenue_95th}, 99th percentile: {revenue_99th}")
+
+        # Flag extreme values (beyond 99th percentile)
+        data_cleaned['ExtremeQuantity'] = (data_cleaned['Quantity'] > qty_99th).astype(int)
+        data_cleaned['ExtremePrice'] = (data_cleaned['UnitPrice'] > price_99th).astype(int)
+        data_cleaned['ExtremeRevenue'] = (data_cleaned['TotalRevenue'] > revenue_99th).astype(int)
+
+    # 7. Clean StockCode and InvoiceNo formats
+    with trace.span('clean_codes', rows=len(data_cleaned)):
+        print("\n=== Cleaning StockCode and InvoiceNo ===")
+        # Ensure InvoiceNo is string
+        data_cleaned['InvoiceNo'] = data_cleaned['InvoiceNo'].astype(str).str.strip()
+
+        # Ensure StockCode is string
+        data_cleaned['StockCode'] = data_cleaned['StockCode'].astype(str).str.strip().str.upper()
+
+    # 8. Canonicalize product codes and descriptions
+    with trace.span('canonicalize_products', rows=len(data_cleaned)) as span:
+        print("\n=== Canonicalizing Products ===")
+        mapping, cached = load_or_build_canonical_mapping(data_cleaned)
+        span['cached'] = cached
+        descriptions_before = data_cleaned['Description_imputed'].copy()
+        data_cleaned = apply_canonical_mapping(data_cleaned, mapping)
+        codes_merged = int((mapping['StockCode'] != mapping['CanonicalStockCode']).sum())
+        descriptions_changed = int((data_cleaned['Description_imputed'] != descriptions_before).sum())
+        print(f"Product mapping {'loaded from' if cached else 'saved to'}: {CANONICAL_FILE}")
+        print(f"Stock codes merged into a near-duplicate: {codes_merged} "
+              f"({mapping['StockCode'].nunique()} -> {mapping['CanonicalStockCode'].nunique()} products)")
+        print(f"Rows with a canonical description: {descriptions_changed}")
+
+    # 9. Final data quality check
+    with trace.span('quality_check', rows=len(data_cleaned)):
+        print("\n=== Final Data Quality Check ===")
+        print(f"Final dataset shape: {data_cleaned.shape}")
+        print(f"Final missing values:\n{data_cleaned[['Description_imputed', 'CustomerID_imputed']].isnull().sum()}")
+        print(f"Date range: {data_cleaned['InvoiceDate'].min()} to {data_cleaned['InvoiceDate'].max()}")
+        print(f"Unique customers: {data_cleaned[data_cleaned['CustomerID_imputed'] > 0]['CustomerID_imputed'].nunique()}")
+        print(f"Unique products: {data_cleaned['StockCode'].nunique()}")
+        print(f"Unique invoices: {data_cleaned['InvoiceNo'].nunique()}")
+
+    # Save cleaned dataset
+    if output_file:
+        with trace.span('save_csv', rows=len(data_cleaned)):
+            data_cleaned.to_csv(output_file, index=False)
+            print(f"\nCleaned dataset saved to: {output_file}")
+
+        # Hourly prefix sums for range and time-series queries (saved after the CSV so it reads as fresh)
+        with trace.span('time_index', rows=len(data_cleaned)) as span:
+            time_index = TimeIndex.build(data_cleaned)
+            time_index.save(TIME_INDEX_FILE)
+            span['buckets'] = time_index.n_buckets
+            print(f"Time index saved to: {TIME_INDEX_FILE} ({time_index.n_buckets:,} hourly buckets)")
+
+        # Sales cube and product rollup for the charts and other consumers of the CSV (also fresh)
+        with trace.span('aggregates', rows=len(data_cleaned)) as span:
+            cube = build_sales_cube(data_cleaned)
+            save_aggregates(cube, build_product_rollup(data_cleaned))
+            span['cells'] = len(cube)
+            print(f"Sales cube saved to: {CUBE_FILE} ({len(cube):,} cells)")
+
+    # Save cleaning summary statistics
+    summary_stats = {
+        'initial_rows': initial_stats['total_rows'],
+        'final_rows': data_cleaned.shape[0],
+        'rows_removed': initial_stats['total_rows'] - data_cleaned.shape[0],
+        'duplicates_removed': initial_stats['duplicates'],
+        'missing_description_initial': initial_stats['missing_description'],
+        'missing_customerid_initial': initial_stats['missing_customerid'],
+        'cancelled_invoices_removed': initial_stats['cancelled_invoices'],
+        'negative_quantities_removed': initial_stats['negative_quantities'],
+        'invalid_prices_removed': initial_stats['invalid_prices'],
+        'cancelled_quantity': cancelled_quantity,
+        'returned_quantity_matched': returned_matched,
+        'stock_codes_merged': codes_merged,
+        'descriptions_canonicalized': descriptions_changed
+    }
+
+    with open(CLEANING_SUMMARY_FILE, 'w') as f:
+        summary_stats = {k: int(v) if hasattr(v, "__int__") else v for k, v in summary_stats.items()}
+        json.dump(summary_stats, f, indent=2)
+
+    print("\n=== Data Cleaning Complete ===")
+    print(f"Summary statistics saved to: {CLEANING_SUMMARY_FILE}")
+
+    trace.finish()
+
+    return data_cleaned
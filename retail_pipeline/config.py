@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Pipeline Configuration
+Database settings and the file locations shared by all stages
+"""
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'online_retail_db',
+    'user': 'postgres',  # Change as needed
+    'password': '123456',  # Change as needed
+    'port': 5432
+}
+
+RAW_FILE = 'Online Retail.xlsx'
+OUTPUT_DIR = 'output'
+CLEANED_FILE = 'output/online_retail_cleaned.csv'
+CLEANING_SUMMARY_FILE = 'output/cleaning_summary.json'
+DATABASE_INFO_FILE = 'output/database_info.json'
+QUERIES_DIR = 'output/queries'
+
+
+def get_connection_string(config=DB_CONFIG):
+    """Build a SQLAlchemy connection string from a DB_CONFIG style dict"""
+    return f"postgresql://{config['user']}:{config['password']}@{config['host']}:{config['port']}/{config['database']}"
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Customer Analytics Stage
+RFM (recency, frequency, monetary) quintile scores and monthly cohort
+retention for every known customer, derived from one customer-month groupby
+"""
+
+import pandas as pd
+import numpy as np
+import os
+
+from .config import CLEANED_FILE, DB_CONFIG, get_connection_string
+from .instrumentation import StageTrace
+
+CUSTOMERS_DIR = 'output/customers'
+RFM_FILE = os.path.join(CUSTOMERS_DIR, 'customer_rfm.csv')
+RETENTION_FILE = os.path.join(CUSTOMERS_DIR, 'cohort_retention.csv')
+RETENTION_MATRIX_FILE = os.path.join(CUSTOMERS_DIR, 'cohort_retention_matrix.csv')
+
+# Named segments from the (R, F) score grid, checked in order; the last one catches the rest
+SEGMENTS = [
+    ('Champions', lambda r, f: (r >= 4) & (f >= 4)),
+    ('Loyal Customers', lambda r, f: (r >= 3) & (f >= 4)),
+    ('Recent Customers', lambda r, f: (r >= 4) & (f <= 2)),
+    ('Potential Loyalists', lambda r, f: r >= 3),
+    ('At Risk', lambda r, f: (r <= 2) & (f >= 3)),
+    ('Hibernating', lambda r, f: r <= 2),
+]
+
+
+def customer_months(data):
+    """Single pass over the transactions: (customer, month) -> revenue, invoices, first/last purchase"""
+    known = data[data['CustomerID_imputed'] > 0]
+    dates = known['InvoiceDate']
+    # Months as an integer count (year * 12 + month) so cohort offsets are plain subtraction
+    month = (dates.dt.year * 12 + dates.dt.month - 1).rename('month')
+    months = known.groupby([known['CustomerID_imputed'].rename('customer_id'), month], sort=True).agg(
+        revenue=('TotalRevenue', 'sum'),
+        invoices=('InvoiceNo', 'nunique'),
+        first_purchase=('InvoiceDate', 'min'),
+        last_purchase=('InvoiceDate', 'max'))
+    return months.reset_index()
+
+
+def quintile(values, ascending=True):
+    """1-5 score by rank; ties are broken by order so the five groups are equal in size"""
+    score = np.ceil(values.rank(method='first', pct=True) * 5).astype(int)
+    return score if ascending else 6 - score
+
+
+def rfm_scores(months, snapshot=None):
+    """Recency (days), frequency (invoices) and monetary value per customer with quintile scores"""
+    # An invoice has one timestamp, so per-month distinct invoice counts sum to the customer total
+    rfm = months.groupby('customer_id').agg(
+        first_purchase=('first_purchase', 'min'),
+        last_purchase=('last_purchase', 'max'),
+        frequency=('invoices', 'sum'),
+        monetary=('revenue', 'sum'),
+        active_months=('month', 'size'))
+    snapshot = snapshot or rfm['last_purchase'].max().normalize() + pd.Timedelta(days=1)
+    rfm['recency_days'] = (snapshot - rfm['last_purchase']).dt.days
+
+    # Recent purchases score high, so recency is ranked in reverse
+    rfm['r_score'] = quintile(rfm['recency_days'], ascending=False)
+    rfm['f_score'] = quintile(rfm['frequency'])
+    rfm['m_score'] = quintile(rfm['monetary'])
+    rfm['rfm_cell'] = rfm['r_score'].astype(str) + rfm['f_score'].astype(str) + rfm['m_score'].astype(str)
+    rfm['rfm_score'] = rfm['r_score'] + rfm['f_score'] + rfm['m_score']
+    rfm['segment'] = np.select([rule(rfm['r_score'], rfm['f_score']) for _, rule in SEGMENTS[:-1]],
+                               [name for name, _ in SEGMENTS[:-1]], default=SEGMENTS[-1][0])
+    return rfm.reset_index()
+
+
+def cohort_retention(months):
+    """Customers and revenue per (first-purchase month, months since) with retention rates"""
+    cohort = months.groupby('customer_id')['month'].transform('min')
+    offsets = months.assign(cohort=cohort, month_offset=months['month'] - cohort)
+    retention = offsets.groupby(['cohort', 'month_offset']).agg(
+        customers=('customer_id', 'size'),
+        revenue=('revenue', 'sum')).reset_index()
+    sizes = retention.loc[retention['month_offset'] == 0].set_index('cohort')['customers']
+    retention['cohort_size'] = retention['cohort'].map(sizes)
+    retention['retention_rate'] = retention['customers'] / retention['cohort_size']
+    retention['cohort_month'] = [f'{m // 12}-{m % 12 + 1:02d}' for m in retention['cohort']]
+    return retention[['cohort_month', 'month_offset', 'cohort_size', 'customers', 'retention_rate', 'revenue']]
+
+
+def retention_matrix(retention):
+    """Cohort x month-offset retention rates, one row per cohort"""
+    return retention.pivot(index='cohort_month', columns='month_offset', values='retention_rate')
+
+
+def save_customer_tables(rfm, retention, config=DB_CONFIG):
+    """Replace the customer_rfm and cohort_retention tables next to online_retail"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(get_connection_string(config))
+    try:
+        rfm.to_sql('customer_rfm', engine, if_exists='replace', index=False, method='multi', chunksize=1000)
+        retention.to_sql('cohort_retention', engine, if_exists='replace', index=False, method='multi', chunksize=1000)
+        with engine.connect() as conn:
+            conn.execute(text("CREATE UNIQUE INDEX idx_customer_rfm_customer ON customer_rfm(customer_id);"))
+            conn.execute(text("CREATE INDEX idx_customer_rfm_segment ON customer_rfm(segment);"))
+            conn.commit()
+    finally:
+        engine.dispose()
+
+
+def analyze_customers(data=None, load_db=False, config=DB_CONFIG, output_dir=CUSTOMERS_DIR):
+    """Compute and save RFM scores and cohort retention; returns (rfm, retention)
+
+    The cleaned CSV is read when no DataFrame is passed in. With load_db the
+    results are also written to the customer_rfm and cohort_retention tables.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    trace = StageTrace('customers')
+
+    if data is None:
+        with trace.span('load_csv') as span:
+            print("Loading cleaned dataset...")
+            data = pd.read_csv(CLEANED_FILE, dtype={'InvoiceNo': str, 'StockCode': str},
+                               parse_dates=['InvoiceDate'])
+            span['rows'] = len(data)
+
+    print("\n=== Customer Analytics ===")
+    with trace.span('customer_months', rows=len(data)) as span:
+        months = customer_months(data)
+        span['result_rows'] = len(months)
+    print(f"Customer-months: {len(months):,}")
+
+    with trace.span('rfm', rows=len(months)):
+        rfm = rfm_scores(months)
+    with trace.span('cohorts', rows=len(months)):
+        retention = cohort_retention(months)
+        matrix = retention_matrix(retention)
+
+    with trace.span('save_csv'):
+        rfm.to_csv(os.path.join(output_dir, os.path.basename(RFM_FILE)), index=False)
+        retention.to_csv(os.path.join(output_dir, os.path.basename(RETENTION_FILE)), index=False)
+        matrix.to_csv(os.path.join(output_dir, os.path.basename(RETENTION_MATRIX_FILE)))
+
+    print(f"Customers scored: {len(rfm):,}")
+    print(f"\nCustomers per segment:\n{rfm['segment'].value_counts().to_string()}")
+    print(f"\nCohorts: {len(matrix)}, average month-1 retention: "
+          f"{retention.loc[retention['month_offset'] == 1, 'retention_rate'].mean():.1%}")
+    print(f"\nResults saved to: {output_dir}/")
+
+    try:
+        if load_db:
+            with trace.span('load_db', rows=len(rfm) + len(retention)):
+                save_customer_tables(rfm, retention, config)
+            print("Loaded tables: customer_rfm, cohort_retention")
+    except Exception as e:
+        print(f"\nError: {e}")
+        print("\nPlease ensure the database is set up and reachable (run 3_database_import.py first)")
+        raise
+    finally:
+        trace.finish()
+
+    return rfm, retention
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Streaming Exact-Duplicate Detection
+Hashes every normalized raw row to a 128-bit digest and drops rows whose
+digest was already seen, across chunks and files, within a memory budget:
+seen digests live in a sorted in-memory buffer that is spilled to sorted,
+memory-mapped runs on disk when it outgrows the budget
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import shutil
+import tempfile
+
+from .ingestion import RAW_COLUMNS
+
+DEDUP_DIR = 'output/cache/dedup'
+# Bytes of seen digests kept in memory (16 bytes per distinct row); about 4M rows for 64 MB
+DEDUP_MEMORY_BUDGET = 64 * 1024 * 1024
+# Spilled runs are merged pairwise once there are more than this many
+MAX_RUNS = 8
+# Digests per block when merging two runs
+MERGE_BLOCK = 1 << 20
+
+# Hash keys of the two 64-bit halves (must be 16 characters); they only change how text is hashed
+_HASH_KEYS = ('retail-dedup-hi0', 'retail-dedup-lo1')
+# Leading constant column of the low half's input (0x9E37... is the 64-bit golden ratio)
+_SALT = np.uint64(0x9E3779B97F4A7C15)
+_TEXT_COLUMNS = ['InvoiceNo', 'StockCode', 'Description', 'Country']
+
+
+def _normalized(frame, column):
+    """One representation per column, so the same row read from a workbook and from a CSV hashes the same"""
+    values = frame[column]
+    if column in _TEXT_COLUMNS:
+        # Missing stays missing instead of becoming the text 'nan', which could then match a real 'nan'
+        return values.astype(str).str.strip().where(values.notna())
+    if column == 'InvoiceDate':
+        return pd.to_datetime(values).astype('datetime64[ns]')
+    return pd.to_numeric(values).astype('float64')
+
+
+def row_digests(frame):
+    """(hi, lo) uint64 halves of a 128-bit digest of each row's raw columns
+
+    hash_pandas_object hashes each column on its own and then combines the
+    column hashes in order. A different hash key alone would only change the
+    text columns, so rows differing in a number or a date would collide in
+    both halves together. The low half therefore hashes the columns in reverse
+    order behind a constant salt column. That changes how every column is
+    combined, so the two halves collide independently.
+    """
+    key = pd.DataFrame({column: _normalized(frame, column) for column in RAW_COLUMNS})
+    salted = key[RAW_COLUMNS[::-1]].copy()
+    salted.insert(0, 'salt', np.full(len(key), _SALT))
+    hi = pd.util.hash_pandas_object(key, index=False, hash_key=_HASH_KEYS[0]).to_numpy()
+    lo = pd.util.hash_pandas_object(salted, index=False, hash_key=_HASH_KEYS[1]).to_numpy()
+    return hi, lo
+
+
+def sort_digests(hi, lo):
+    """Digests ordered by their high half; equal high halves are resolved on lookup"""
+    order = np.argsort(hi, kind='stable')
+    return hi[order], lo[order]
+
+
+def contains(sorted_hi, sorted_lo, hi, lo):
+    """Membership of each (hi, lo) digest in a set sorted by its high half"""
+    left = np.searchsorted(sorted_hi, hi, 'left')
+    right = np.searchsorted(sorted_hi, hi, 'right')
+    found = np.zeros(len(hi), dtype=bool)
+    # Almost every high half matches at most one entry, so this loop runs once or not at all
+    for offset in range(int((right - left).max(initial=0))):
+        check = left + offset < right
+        found[check] |= np.asarray(sorted_lo[(left + offset)[check]]) == lo[check]
+    return found
+
+
+def merge_runs(first, second, path, block=MERGE_BLOCK):
+    """Merge two sorted (2, n) runs into a new run file, holding at most two blocks in memory"""
+    n_first, n_second = first.shape[1], second.shape[1]
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint64, shape=(2, n_first + n_second))
+    i = j = k = 0
+    while i < n_first or j < n_second:
+        a = np.asarray(first[:, i:i + block])
+        b = np.asarray(second[:, j:j + block])
+        # Only emit keys up to the smallest block end of a run that continues past its block
+        limits = [run[0, -1] for run, more in ((a, i + block < n_first), (b, j + block < n_second)) if more]
+        if limits:
+            limit = min(limits)
+            a = a[:, :np.searchsorted(a[0], limit, 'right')]
+            b = b[:, :np.searchsorted(b[0], limit, 'right')]
+        merged = np.concatenate([a, b], axis=1)
+        out[:, k:k + merged.shape[1]] = merged[:, np.argsort(merged[0], kind='stable')]
+        i, j, k = i + a.shape[1], j + b.shape[1], k + merged.shape[1]
+    out.flush()
+    del out
+    return np.load(path, mmap_mode='r')
+
+
+class StreamingDeduplicator:
+    """Keeps the first occurrence of every distinct raw row across a stream of DataFrames
+
+    Usage:
+        with StreamingDeduplicator(memory_budget=32 * 1024 * 1024) as dedup:
+            for path, frame in iter_batches(source):
+                frame = frame[dedup.keep_mask(frame)]
+        dedup.duplicates    # rows dropped so far
+    """
+
+    def __init__(self, memory_budget=DEDUP_MEMORY_BUDGET, spill_dir=DEDUP_DIR):
+        self.capacity = max(memory_budget // 16, 1)
+        self.spill_dir = spill_dir
+        self._run_dir = None
+        self._hi = np.empty(0, dtype=np.uint64)
+        self._lo = np.empty(0, dtype=np.uint64)
+        self._runs = []
+        self._run_count = 0
+        self.rows = 0
+        self.duplicates = 0
+        self.spills = 0
+
+    def keep_mask(self, frame):
+        """Boolean mask of rows seen for the first time; the rows are recorded as seen"""
+        if len(frame) == 0:
+            return np.zeros(0, dtype=bool)
+        hi, lo = row_digests(frame)
+
+        # First occurrence within the chunk (lexsort is stable, so the earliest row comes first)
+        order = np.lexsort((lo, hi))
+        sorted_hi, sorted_lo = hi[order], lo[order]
+        first = np.r_[True, (sorted_hi[1:] != sorted_hi[:-1]) | (sorted_lo[1:] != sorted_lo[:-1])]
+        keep = np.zeros(len(frame), dtype=bool)
+        keep[order[first]] = True
+
+        # Then against every digest from earlier chunks, in memory and on disk
+        candidates = np.flatnonzero(keep)
+        keep[candidates[self._seen(hi[candidates], lo[candidates])]] = False
+
+        self._add(hi[keep], lo[keep])
+        self.rows += len(frame)
+        self.duplicates += int(len(frame) - keep.sum())
+        return keep
+
+    def _seen(self, hi, lo):
+        """Membership of each digest in the in-memory buffer or any spilled run"""
+        seen = contains(self._hi, self._lo, hi, lo)
+        # Runs are only referenced during the lookup, so a later spill can unmap and delete them
+        for run in self._runs:
+            unseen = ~seen
+            seen[unseen] = contains(run[0], run[1], hi[unseen], lo[unseen])
+        return seen
+
+    def _add(self, hi, lo):
+        self._hi, self._lo = sort_digests(np.concatenate([self._hi, hi]), np.concatenate([self._lo, lo]))
+        if len(self._hi) > self.capacity:
+            self._spill()
+
+    def _run_path(self):
+        if self._run_dir is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._run_dir = tempfile.mkdtemp(prefix='run-', dir=self.spill_dir)
+        self._run_count += 1
+        return os.path.join(self._run_dir, f'{self._run_count:05d}.npy')
+
+    def _spill(self):
+        """Write the in-memory buffer as a sorted run and start an empty one"""
+        path = self._run_path()
+        np.save(path, np.vstack([self._hi, self._lo]))
+        self._runs.append(np.load(path, mmap_mode='r'))
+        self.spills += 1
+        self._hi = np.empty(0, dtype=np.uint64)
+        self._lo = np.empty(0, dtype=np.uint64)
+        # Merge the two smallest runs so lookups touch a bounded number of files
+        while len(self._runs) > MAX_RUNS:
+            self._runs.sort(key=lambda run: run.shape[1])
+            first, second = self._runs[:2]
+            merged = merge_runs(first, second, self._run_path())
+            paths = [first.filename, second.filename]
+            self._runs = [merged] + self._runs[2:]
+            # Drop the last references so both maps are closed first; Windows cannot delete a mapped file
+            del first, second
+            for path in paths:
+                os.remove(path)
+
+    def close(self):
+        """Drop the spilled runs from disk"""
+        # Unmap the runs before their files are deleted
+        self._runs = []
+        if self._run_dir is not None:
+            shutil.rmtree(self._run_dir)
+            self._run_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Raw Data Ingestion
+Reads one raw file, a directory or a glob of monthly extracts (.xlsx, .csv,
+.csv.gz) in parallel and normalizes every file to the Online Retail schema
+"""
+
+import pandas as pd
+import numpy as np
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+RAW_EXTENSIONS = ('.xlsx', '.csv', '.csv.gz')
+
+# Raw column schema expected by the cleaning stage
+RAW_COLUMNS = ['InvoiceNo', 'StockCode', 'Description', 'Quantity', 'InvoiceDate', 'UnitPrice', 'CustomerID', 'Country']
+
+# Header spellings (lower case, spaces and underscores removed) -> schema column;
+# covers both the Online Retail and the Online Retail II extract layouts
+COLUMN_ALIASES = {
+    'invoiceno': 'InvoiceNo', 'invoice': 'InvoiceNo',
+    'stockcode': 'StockCode',
+    'description': 'Description',
+    'quantity': 'Quantity',
+    'invoicedate': 'InvoiceDate',
+    'unitprice': 'UnitPrice', 'price': 'UnitPrice',
+    'customerid': 'CustomerID',
+    'country': 'Country',
+}
+
+
+def discover_files(source):
+    """Resolve a file, directory or glob pattern to a sorted list of raw data files"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    elif any(c in source for c in '*?['):
+        paths = glob.glob(source)
+    else:
+        paths = [source]
+    # Skip Excel lock files (~$name.xlsx) left by an open workbook
+    files = sorted(p for p in paths if p.lower().endswith(RAW_EXTENSIONS)
+                   and not os.path.basename(p).startswith('~$'))
+    if not files:
+        raise FileNotFoundError(f"No .xlsx, .csv or .csv.gz files found for: {source}")
+    missing = [p for p in files if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"Raw data file not found: {missing[0]}")
+    return files
+
+
+def resolve_columns(header, path):
+    """Map a file's header to the schema columns; raises if a required column is missing"""
+    mapping = {}
+    for column in header:
+        key = str(column).strip().lower().replace(' ', '').replace('_', '')
+        if key in COLUMN_ALIASES and COLUMN_ALIASES[key] not in mapping.values():
+            mapping[column] = COLUMN_ALIASES[key]
+    missing = [c for c in RAW_COLUMNS if c not in mapping.values()]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing} (found {list(header)})")
+    return mapping
+
+
+def read_xlsx(path):
+    """Stream every worksheet with openpyxl's read-only mode instead of loading the workbook DOM"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    frames = []
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            mapping = resolve_columns(header, f'{path} [{sheet.title}]')
+            positions = {schema: header.index(column) for column, schema in mapping.items()}
+            columns = {schema: [] for schema in RAW_COLUMNS}
+            for row in rows:
+                if not any(v is not None for v in row):
+                    continue
+                for schema, position in positions.items():
+                    columns[schema].append(row[position] if position < len(row) else None)
+            frames.append(pd.DataFrame(columns))
+    finally:
+        workbook.close()
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RAW_COLUMNS)
+
+
+def read_csv(path):
+    """Read only the schema columns of a (possibly gzipped) CSV, with codes kept as strings"""
+    mapping = resolve_columns(pd.read_csv(path, nrows=0).columns, path)
+    text_columns = {'InvoiceNo', 'StockCode', 'Description', 'Country'}
+    frame = pd.read_csv(path, usecols=list(mapping),
+                        dtype={column: str for column, schema in mapping.items() if schema in text_columns})
+    return frame.rename(columns=mapping)
+
+
+def as_text(values):
+    """Values as strings, with every kind of missing cell (None from openpyxl, NaN) as NaN"""
+    values = pd.Series(values, dtype=object)
+    return values.where(values.isnull(), values.astype(str)).fillna(np.nan)
+
+
+def as_code(values):
+    """Invoice numbers and stock codes as stripped strings (Excel stores numeric ones as numbers)"""
+    values = pd.Series(values, dtype=object)
+    numeric = values.map(lambda v: isinstance(v, float) and v.is_integer())
+    values[numeric] = values[numeric].astype('int64')
+    return as_text(values).str.strip()
+
+
+def normalize_frame(frame, path):
+    """Cast one file's columns to the dtypes the cleaning stage expects"""
+    frame = frame[RAW_COLUMNS].copy()
+    frame['InvoiceNo'] = as_code(frame['InvoiceNo'])
+    frame['StockCode'] = as_code(frame['StockCode'])
+    frame['Description'] = as_text(frame['Description'])
+    frame['Country'] = as_text(frame['Country'])
+    frame['Quantity'] = pd.to_numeric(frame['Quantity'])
+    if frame['Quantity'].notna().all():
+        frame['Quantity'] = frame['Quantity'].astype('int64')
+    frame['UnitPrice'] = pd.to_numeric(frame['UnitPrice']).astype('float64')
+    frame['CustomerID'] = pd.to_numeric(frame['CustomerID']).astype('float64')
+    try:
+        frame['InvoiceDate'] = pd.to_datetime(frame['InvoiceDate'])
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"{path}: could not parse InvoiceDate ({e})")
+    return frame
+
+
+def read_raw_file(path):
+    """Read and normalize one raw file (runs in a worker process)"""
+    frame = read_xlsx(path) if path.lower().endswith('.xlsx') else read_csv(path)
+    return normalize_frame(frame, path)
+
+
+def iter_batches(source, workers=None):
+    """Yield (path, normalized DataFrame) per file, in file order, parsing files in parallel"""
+    files = discover_files(source)
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        for path in files:
+            yield path, read_raw_file(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() keeps file order while later files are still being parsed
+        for path, frame in zip(files, pool.map(read_raw_file, files)):
+            yield path, frame
+
+
+def read_raw(source, workers=None, deduplicator=None):
+    """Combined normalized DataFrame for a file, directory or glob of raw extracts
+
+    With a deduplicator (see dedup.py), rows already seen in this or an earlier
+    file are dropped as each file arrives.
+    """
+    frames = []
+    for path, frame in iter_batches(source, workers):
+        if deduplicator is None:
+            print(f"  {path}: {len(frame):,} rows")
+        else:
+            rows = len(frame)
+            frame = frame[deduplicator.keep_mask(frame)].reset_index(drop=True)
+            print(f"  {path}: {rows:,} rows, {rows - len(frame):,} duplicates")
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
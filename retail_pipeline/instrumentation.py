@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Lightweight Stage Instrumentation
+Times named spans and records peak RSS and rows/second for each pipeline step,
+plus peak Python allocations when tracemalloc is switched on
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACE_DIR = 'output/traces'
+PROFILE_DIR = 'output/profiles'
+
+# RETAIL_PROFILE=cleaning,queries (or 'all') dumps a cProfile file for those stages
+PROFILE_ENV = 'RETAIL_PROFILE'
+# RETAIL_TRACEMALLOC=1 turns on Python allocation tracking; off by default as it slows allocation-heavy code
+TRACEMALLOC_ENV = 'RETAIL_TRACEMALLOC'
+# Set by run_all.py so the traces of one pipeline run can be collected together
+RUN_ID_ENV = 'RETAIL_RUN_ID'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def profiling_requested(stage):
+    """Whether RETAIL_PROFILE asks for a cProfile dump of this stage"""
+    requested = {s.strip() for s in os.environ.get(PROFILE_ENV, '').split(',') if s.strip()}
+    return 'all' in requested or stage in requested
+
+
+class StageTrace:
+    """Collects timed spans for one pipeline stage and writes them as a JSON trace
+
+    Usage:
+        trace = StageTrace('cleaning')
+        with trace.span('load_excel') as span:
+            data = pd.read_excel(...)
+            span['rows'] = len(data)
+        trace.finish()
+    """
+
+    def __init__(self, stage, trace_dir=TRACE_DIR, profile_dir=PROFILE_DIR):
+        self.stage = stage
+        self.trace_dir = trace_dir
+        self.profile_dir = profile_dir
+        self.spans = []
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._start = time.perf_counter()
+        self._start_rss_mb = peak_rss_mb()
+        self._peak_stack = []
+
+        self.track_memory = os.environ.get(TRACEMALLOC_ENV, '0') == '1'
+        self._owns_tracemalloc = self.track_memory and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+
+        self.profiler = None
+        if profiling_requested(stage):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @contextmanager
+    def span(self, name, rows=None):
+        """Time a named step; set record['rows'] inside the block if not known up front"""
+        record = {'name': name, 'depth': len(self._peak_stack), 'rows': rows}
+        # Appended on entry so nested spans are listed after their parent
+        self.spans.append(record)
+        if self.track_memory:
+            # Fold the allocation peak so far into the enclosing span before resetting it
+            self._fold_peak()
+            tracemalloc.reset_peak()
+        self._peak_stack.append(0)
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 4)
+            if self.track_memory:
+                self._fold_peak()
+                peak = self._peak_stack.pop()
+                tracemalloc.reset_peak()
+                if self._peak_stack:
+                    self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+                record['tracemalloc_peak_mb'] = round(peak / (1024 * 1024), 1)
+            else:
+                self._peak_stack.pop()
+            record['peak_rss_mb'] = peak_rss_mb()
+            record['rows_per_second'] = round(record['rows'] / record['seconds'], 1) \
+                if record['rows'] and record['seconds'] > 0 else None
+
+    def record(self, name, seconds, rows=None, depth=0, **extra):
+        """Add a span measured elsewhere, e.g. by a worker process"""
+        record = {'name': name, 'depth': depth, 'rows': rows, 'seconds': round(seconds, 4)}
+        record.update(extra)
+        record['rows_per_second'] = round(rows / seconds, 1) if rows and seconds > 0 else None
+        self.spans.append(record)
+        return record
+
+    def _fold_peak(self):
+        """Record the current tracemalloc peak against the innermost open span"""
+        if self._peak_stack:
+            self._peak_stack[-1] = max(self._peak_stack[-1], tracemalloc.get_traced_memory()[1])
+
+    def finish(self):
+        """Stop profiling and write output/traces/<stage>.json; returns the trace dict"""
+        total_seconds = time.perf_counter() - self._start
+
+        profile_file = None
+        if self.profiler is not None:
+            self.profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profile_file = os.path.join(self.profile_dir, f'{self.stage}.prof')
+            self.profiler.dump_stats(profile_file)
+            self.profiler = None
+
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+        process_peak = peak_rss_mb()
+        trace = {
+            'stage': self.stage,
+            'run_id': os.environ.get(RUN_ID_ENV),
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'total_seconds': round(total_seconds, 4),
+            # Stages share one process, so the peak is the process high-water mark; the growth is this stage's
+            'peak_rss_mb': process_peak,
+            'rss_growth_mb': round(process_peak - self._start_rss_mb, 1) if process_peak is not None else None,
+            'tracemalloc': self.track_memory,
+            'profile_file': profile_file,
+            'spans': self.spans,
+        }
+
+        os.makedirs(self.trace_dir, exist_ok=True)
+        trace_file = os.path.join(self.trace_dir, f'{self.stage}.json')
+        with open(trace_file, 'w') as f:
+            json.dump(trace, f, indent=2)
+
+        print(f"\nStage trace saved to: {trace_file}")
+        if profile_file:
+            print(f"cProfile dump saved to: {profile_file} (inspect with: python -m pstats {profile_file})")
+        return trace
+
+
+def load_traces(run_id=None, trace_dir=TRACE_DIR):
+    """Read all stage traces, optionally only those written during one run"""
+    traces = []
+    if not os.path.isdir(trace_dir):
+        return traces
+    for name in sorted(os.listdir(trace_dir)):
+        if not name.endswith('.json') or name == 'run_summary.json':
+            continue
+        with open(os.path.join(trace_dir, name)) as f:
+            trace = json.load(f)
+        if run_id is None or trace.get('run_id') == run_id:
+            traces.append(trace)
+    return traces
+
+
+def print_run_breakdown(traces, wall_seconds=None, summary_file=None):
+    """Print where the time went across stages; optionally save the summary as JSON
+
+    wall_seconds maps stage name to the wall time run_all.py measures around the in-process
+    stage call, so module imports on first use show up as their own line. RSS +MB is how far
+    the stage raised the process peak RSS; 0 means it stayed under an earlier stage's peak.
+    """
+    wall_seconds = wall_seconds or {}
+    total = sum(wall_seconds.values()) or sum(t['total_seconds'] for t in traces)
+
+    print(f"\n{'Stage / span':<40}{'Seconds':>10}{'Share':>8}{'Rows/s':>14}{'Py peak MB':>12}{'RSS +MB':>9}")
+    print("-" * 93)
+    summary = []
+    for trace in traces:
+        stage_wall = wall_seconds.get(trace['stage'], trace['total_seconds'])
+        rss_growth = trace.get('rss_growth_mb')
+        print(f"{trace['stage']:<40}{stage_wall:>10.2f}{stage_wall / total * 100 if total else 0:>7.1f}%"
+              f"{'':>14}{'':>12}{rss_growth if rss_growth is not None else '':>9}")
+        overhead = stage_wall - trace['total_seconds']
+        if trace['stage'] in wall_seconds and overhead > 0:
+            print(f"  {'(module imports)':<38}{overhead:>10.2f}{overhead / total * 100:>7.1f}%")
+        for span in trace['spans']:
+            label = '  ' * (span['depth'] + 1) + span['name']
+            rows_per_second = f"{span['rows_per_second']:,.0f}" if span.get('rows_per_second') else ''
+            py_peak = span.get('tracemalloc_peak_mb')
+            print(f"{label:<40}{span['seconds']:>10.2f}{span['seconds'] / total * 100 if total else 0:>7.1f}%"
+                  f"{rows_per_second:>14}{py_peak if py_peak is not None else '':>12}{'':>9}")
+        summary.append({'stage': trace['stage'], 'wall_seconds': round(stage_wall, 4),
+                        'traced_seconds': trace['total_seconds'], 'rss_growth_mb': rss_growth,
+                        'process_peak_rss_mb': trace['peak_rss_mb'],
+                        'slowest_span': max(trace['spans'], key=lambda s: s['seconds'])['name'] if trace['spans'] else None})
+    print("-" * 93)
+    peaks = [t['peak_rss_mb'] for t in traces if t['peak_rss_mb'] is not None]
+    print(f"{'Total':<40}{total:>10.2f}{'':>8}{'':>14}{'':>12}{max(peaks) if peaks else '':>9}")
+    if peaks:
+        print("(Total RSS is the process peak; stage rows show how much each stage raised it)")
+
+    if summary_file:
+        with open(summary_file, 'w') as f:
+            json.dump({'total_seconds': round(total, 4), 'peak_rss_mb': max(peaks) if peaks else None,
+                       'stages': summary}, f, indent=2)
+        print(f"\nRun summary saved to: {summary_file}")
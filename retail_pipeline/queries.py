@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+SQL Queries Stage for Business Analysis
+Answers key business questions about the online retail dataset
+"""
+
+import pandas as pd
+from sqlalchemy import create_engine
+import json
+import os
+
+from .business_queries import QUERIES, build_answers
+from .config import DB_CONFIG, QUERIES_DIR, get_connection_string
+from .instrumentation import StageTrace
+
+
+def print_answers(answers):
+    """Print the business answers document built by build_answers()"""
+    print("\nANSWERS TO BUSINESS QUESTIONS:")
+    print("=" * 50)
+    print("\n1. Who are our best customers?")
+    by_revenue = answers['question_1_best_customers']['by_revenue']
+    by_frequency = answers['question_1_best_customers']['by_frequency']
+    print(f"   By Revenue: Customer ID {by_revenue['customer_id']} with ${by_revenue['total_revenue']:,.2f} in total revenue")
+    print(f"   By Frequency: Customer ID {by_frequency['customer_id']} with {by_frequency['total_orders']} orders")
+
+    print("\n2. What time of day/day of week has the highest sales?")
+    best = answers['question_2_best_time_for_sales']
+    print(f"   Time of Day: {best['time_of_day']} with ${best['total_revenue']:,.2f} in total revenue")
+    print(f"   Day of Week: {best['day_of_week']} with ${best['day_total_revenue']:,.2f} in total revenue")
+    print(f"   Hour of Day: {best['hour_of_day']}:00 with ${best['hour_total_revenue']:,.2f} in total revenue")
+
+    print("\n3. Can we identify products that are frequently bought together?")
+    top_pair = answers['question_3_products_bought_together']['top_pair']
+    if isinstance(top_pair, dict):
+        print(f"   Top Pair: {top_pair['product1']} & {top_pair['product2']}")
+        print(f"   Co-occurred in {top_pair['co_occurrence_count']} invoices together")
+    else:
+        print("   No significant product pairs found")
+
+    print("\n4. How much revenue do returns take back?")
+    returns = answers['question_4_returns']
+    print(f"   Net revenue ${returns['net_revenue']:,.2f} of ${returns['total_revenue']:,.2f} gross "
+          f"({returns['returned_share']:.1%} returned)")
+    if isinstance(returns['most_returned_product'], dict):
+        print(f"   Most returned product: {returns['most_returned_product']['product']} "
+              f"(${returns['most_returned_product']['returned_revenue']:,.2f} returned)")
+
+
+def run_queries(config=DB_CONFIG, output_dir=QUERIES_DIR):
+    """Run the business queries; returns (query name -> DataFrame, business answers)"""
+    # Create output directory
+    os.makedirs(output_dir, exist_ok=True)
+
+    trace = StageTrace('queries')
+
+    try:
+        # Create connection
+        engine = create_engine(get_connection_string(config))
+
+        print("=== Running Business Analysis Queries ===\n")
+
+        # The queries are defined in business_queries.py so the benchmark and load tester replay the same workload
+        results = {}
+        for number, (name, title, query, output_name) in enumerate(QUERIES, start=1):
+            print(f"{number}. {title}")
+            print("-" * 50)
+
+            with trace.span(f'query:{name}') as span:
+                df = pd.read_sql(query, engine)
+                span['result_rows'] = len(df)
+            print(df.to_string(index=False))
+            output_file = os.path.join(output_dir, output_name)
+            df.to_csv(output_file, index=False)
+            print(f"\nResults saved to: {output_file}\n")
+            results[name] = df
+
+        answers = build_answers(results)
+
+        # Save answers
+        answers_file = os.path.join(output_dir, 'business_answers.json')
+        with open(answers_file, 'w') as f:
+            json.dump(answers, f, indent=2)
+
+        print("=== Business Questions Answers ===")
+        print("-" * 50)
+        print_answers(answers)
+
+        print("\n=== All Queries Complete ===")
+        print(f"All query results saved to: {output_dir}/")
+        print(f"Business answers saved to: {answers_file}")
+
+    except Exception as e:
+        print(f"\nError: {e}")
+        print("\nPlease ensure:")
+        print("1. Database is set up and data is imported (run 3_database_import.py first)")
+        print("2. Database credentials are correct")
+        print("3. Required Python packages are installed: pandas, sqlalchemy")
+        raise
+
+    finally:
+        trace.finish()
+
+    return results, answers
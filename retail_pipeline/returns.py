@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Returns Matching
+Links cancellation lines ('C' invoices) to the purchases they return with
+sort-merge as-of joins per (CustomerID, StockCode), allocating returned
+quantity to the earliest earlier purchases first (FIFO)
+"""
+
+import pandas as pd
+import numpy as np
+import os
+
+RETURNS_DIR = 'output/returns'
+RETURN_LINKS_FILE = os.path.join(RETURNS_DIR, 'return_links.csv')
+
+_LINE_COLUMNS = ['InvoiceNo', 'InvoiceDate', 'StockCode', 'Quantity', 'UnitPrice', 'CustomerID']
+
+
+def cancellation_lines(data):
+    """Lines of cancelled invoices that give quantity back"""
+    cancelled = data['InvoiceNo'].astype(str).str.startswith('C') & (data['Quantity'] < 0)
+    return data.loc[cancelled]
+
+
+def _keyed(purchases, cancellations):
+    """Known-customer lines of both sides with an integer (CustomerID, StockCode) group id"""
+    bought = purchases.loc[purchases['CustomerID'].notna(), _LINE_COLUMNS].rename_axis('row').reset_index()
+    returned = cancellations.loc[cancellations['CustomerID'].notna(), _LINE_COLUMNS].rename_axis('row').reset_index()
+    keys = pd.concat([bought[['CustomerID', 'StockCode']], returned[['CustomerID', 'StockCode']]], ignore_index=True)
+    keys['StockCode'] = keys['StockCode'].astype(str).str.strip().str.upper()
+    group = keys.groupby(['CustomerID', 'StockCode'], sort=False).ngroup().to_numpy()
+    bought['group'], returned['group'] = group[:len(bought)], group[len(bought):]
+    codes = keys['StockCode'].to_numpy()
+    bought['code'], returned['code'] = codes[:len(bought)], codes[len(bought):]
+    return bought, returned
+
+
+def match_returns(purchases, cancellations):
+    """Returned quantity per purchase line and the cancellation -> purchase links
+
+    Within a (customer, product) group, let P(t) be the quantity bought up to
+    time t and R_j the quantity cancelled by the j-th cancellation. A
+    cancellation can only return units bought before it, so the quantity
+    matched by the first j cancellations is
+
+        M_j = min(M_(j-1) + r_j, P(t_j)) = R_j + min(0, min over i <= j of (P(t_i) - R_i))
+
+    which is a cumulative minimum per group. The M_final matched units are then
+    taken from the group's purchases oldest first: returned_k = clip(M_final - P_(k-1), 0, q_k).
+    Returns (returned quantity aligned to purchases.index, links DataFrame,
+    matched quantity aligned to cancellations.index).
+    """
+    bought, returned = _keyed(purchases, cancellations)
+
+    # Purchased quantity to date per group, oldest purchase first
+    bought = bought.sort_values(['group', 'InvoiceDate', 'row'], kind='stable').reset_index(drop=True)
+    bought['bought_to'] = bought.groupby('group')['Quantity'].cumsum()
+    bought['bought_from'] = bought['bought_to'] - bought['Quantity']
+
+    # P(t_j): quantity bought up to each cancellation, by an as-of join on InvoiceDate
+    returned['returned'] = -returned['Quantity']
+    returned = pd.merge_asof(
+        returned.sort_values('InvoiceDate', kind='stable'),
+        bought[['InvoiceDate', 'group', 'bought_to']].sort_values('InvoiceDate', kind='stable'),
+        on='InvoiceDate', by='group', direction='backward')
+    returned['bought_to'] = returned['bought_to'].fillna(0).astype('int64')
+    returned = returned.sort_values(['group', 'InvoiceDate', 'row'], kind='stable').reset_index(drop=True)
+    cancelled_to = returned.groupby('group')['returned'].cumsum()
+    slack = (returned['bought_to'] - cancelled_to).groupby(returned['group']).cummin()
+    returned['matched_to'] = cancelled_to + np.minimum(slack, 0)
+    returned['matched_from'] = returned.groupby('group')['matched_to'].shift(fill_value=0)
+    returned['matched'] = returned['matched_to'] - returned['matched_from']
+
+    # FIFO allocation of each group's matched total to its purchases
+    matched_total = returned.groupby('group')['matched_to'].last()
+    total = bought['group'].map(matched_total).fillna(0).astype('int64')
+    bought['returned'] = (total - bought['bought_from']).clip(lower=0).clip(upper=bought['Quantity'])
+
+    links = link_lines(bought, returned)
+    returned_quantity = pd.Series(0, index=purchases.index, dtype='int64')
+    returned_quantity.loc[bought['row'].to_numpy()] = bought['returned'].to_numpy()
+    matched_quantity = pd.Series(0, index=cancellations.index, dtype='int64')
+    matched_quantity.loc[returned['row'].to_numpy()] = returned['matched'].to_numpy()
+    return returned_quantity, links, matched_quantity
+
+
+def link_lines(bought, returned):
+    """One row per (cancellation, purchase) pair sharing matched units
+
+    Purchase k covers units [bought_from, bought_to) of its group and
+    cancellation j covers [matched_from, matched_to). The union of both sets of
+    interval ends cuts the matched units into segments that each lie in one
+    purchase and one cancellation, found with forward as-of joins.
+    """
+    touched = bought['returned'] > 0
+    # The last purchase touched may be only partly returned, so its returned units end before bought_to
+    purchase_ends = pd.DataFrame({'group': bought.loc[touched, 'group'],
+                                  'end': bought.loc[touched, 'bought_from'] + bought.loc[touched, 'returned']})
+    cancel_ends = returned.loc[returned['matched'] > 0, ['group', 'matched_to']]
+    ends = pd.concat([purchase_ends, cancel_ends.rename(columns={'matched_to': 'end'})]) \
+        .drop_duplicates().sort_values(['group', 'end']).reset_index(drop=True)
+    ends['start'] = ends.groupby('group')['end'].shift(fill_value=0)
+
+    ends = ends.sort_values('end', kind='stable')
+    segments = pd.merge_asof(ends, bought[['group', 'bought_to', 'InvoiceNo', 'InvoiceDate', 'code',
+                                           'UnitPrice', 'CustomerID']].sort_values('bought_to'),
+                             left_on='end', right_on='bought_to', by='group', direction='forward')
+    segments = pd.merge_asof(segments, returned[['group', 'matched_to', 'InvoiceNo', 'InvoiceDate']]
+                             .loc[returned['matched'] > 0].sort_values('matched_to'),
+                             left_on='end', right_on='matched_to', by='group', direction='forward',
+                             suffixes=('', '_cancel'))
+
+    links = pd.DataFrame({
+        'CustomerID': segments['CustomerID'].astype('int64'),
+        'StockCode': segments['code'],
+        'PurchaseInvoice': segments['InvoiceNo'],
+        'PurchaseDate': segments['InvoiceDate'],
+        'CancellationInvoice': segments['InvoiceNo_cancel'],
+        'CancellationDate': segments['InvoiceDate_cancel'],
+        'Quantity': (segments['end'] - segments['start']).astype('int64'),
+        'UnitPrice': segments['UnitPrice'],
+    })
+    links['ReturnedRevenue'] = (links['Quantity'] * links['UnitPrice']).round(2)
+    links['DaysToReturn'] = (links['CancellationDate'] - links['PurchaseDate']).dt.days
+    return links.sort_values(['CancellationDate', 'CancellationInvoice', 'StockCode']).reset_index(drop=True)
+
+
+def add_net_columns(purchases, returned_quantity):
+    """ReturnedQuantity, NetQuantity, NetRevenue and the invoice-level InvoiceReturnRate"""
+    purchases['ReturnedQuantity'] = returned_quantity
+    purchases['NetQuantity'] = purchases['Quantity'] - purchases['ReturnedQuantity']
+    purchases['NetRevenue'] = purchases['NetQuantity'] * purchases['UnitPrice']
+    # Share of each invoice's revenue that was later returned
+    invoice = purchases['InvoiceNo']
+    gross = (purchases['Quantity'] * purchases['UnitPrice']).groupby(invoice).transform('sum')
+    refunded = (purchases['ReturnedQuantity'] * purchases['UnitPrice']).groupby(invoice).transform('sum')
+    purchases['InvoiceReturnRate'] = refunded / gross
+    return purchases
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Prefix-Sum Time Index
+Dense hourly buckets of revenue, net revenue, quantity, invoices and lines stored as
+cumulative sums, so the total over any time range is two lookups and any
+coarser series (daily, weekly, monthly) is one lookup per output bucket
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+from datetime import datetime
+
+from .config import CLEANED_FILE
+
+TIME_INDEX_DIR = 'output/time_index'
+TIME_INDEX_FILE = os.path.join(TIME_INDEX_DIR, 'hourly_cumsum.npy')
+
+MEASURES = ['revenue', 'net_revenue', 'quantity', 'invoices', 'lines']
+# Measures that are whole numbers; stored as float64 alongside revenue and cast back on the way out
+COUNT_MEASURES = ['quantity', 'invoices', 'lines']
+BUCKET = pd.Timedelta(hours=1)
+
+
+def _metadata_file(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+class TimeIndex:
+    """Cumulative hourly sums: row i holds the totals of every bucket before bucket i
+
+    Usage:
+        index = TimeIndex.load()
+        index.range('2011-01-01', '2011-04-01')     # {'revenue': ..., 'quantity': ..., ...}
+        index.resample('MS', start='2011-01-01')    # monthly DataFrame
+    """
+
+    def __init__(self, cumulative, start, measures=MEASURES):
+        self.cumulative = cumulative
+        self.start = pd.Timestamp(start)
+        self.measures = list(measures)
+        self.n_buckets = len(cumulative) - 1
+
+    @property
+    def end(self):
+        """Exclusive end of the last bucket"""
+        return self.start + self.n_buckets * BUCKET
+
+    @classmethod
+    def build(cls, data):
+        """One pass over the cleaned transactions; an invoice has one timestamp so it lands in one bucket"""
+        if len(data) == 0:
+            # Nothing to index (every row filtered out, or an empty table): no buckets, all totals zero
+            return cls(np.zeros((1, len(MEASURES))), pd.Timestamp(0))
+        dates = pd.to_datetime(data['InvoiceDate'])
+        start = dates.min().floor('h')
+        bucket = ((dates - start) // BUCKET).to_numpy(np.int64)
+        n_buckets = int(bucket.max()) + 1
+
+        invoice_bucket = pd.DataFrame({'invoice': data['InvoiceNo'].to_numpy(), 'bucket': bucket}) \
+            .drop_duplicates('invoice')['bucket'].to_numpy()
+        per_bucket = np.column_stack([
+            np.bincount(bucket, weights=data['TotalRevenue'].to_numpy(np.float64), minlength=n_buckets),
+            np.bincount(bucket, weights=data['NetRevenue'].to_numpy(np.float64), minlength=n_buckets),
+            np.bincount(bucket, weights=data['Quantity'].to_numpy(np.float64), minlength=n_buckets),
+            np.bincount(invoice_bucket, minlength=n_buckets),
+            np.bincount(bucket, minlength=n_buckets),
+        ]).astype(np.float64)
+
+        cumulative = np.zeros((n_buckets + 1, len(MEASURES)))
+        np.cumsum(per_bucket, axis=0, out=cumulative[1:])
+        return cls(cumulative, start)
+
+    def save(self, path=TIME_INDEX_FILE):
+        """Write the cumulative array (.npy) and its JSON sidecar"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.save(path, self.cumulative)
+        with open(_metadata_file(path), 'w') as f:
+            json.dump({
+                'start': self.start.isoformat(),
+                'bucket': '1h',
+                'n_buckets': self.n_buckets,
+                'measures': self.measures,
+                'built_at': datetime.now().isoformat(timespec='seconds')
+            }, f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path=TIME_INDEX_FILE):
+        """Memory-map a saved index; only the rows touched by a query are read from disk"""
+        with open(_metadata_file(path)) as f:
+            meta = json.load(f)
+        return cls(np.load(path, mmap_mode='r'), meta['start'], meta['measures'])
+
+    def _position(self, when):
+        """Bucket boundary at or before a timestamp, clipped to the indexed range"""
+        offset = (pd.Timestamp(when) - self.start) // BUCKET
+        return min(max(int(offset), 0), self.n_buckets)
+
+    def _columns(self, measures):
+        measures = [measures] if isinstance(measures, str) else list(measures or self.measures)
+        unknown = [m for m in measures if m not in self.measures]
+        if unknown:
+            raise ValueError(f"Unknown measure: {', '.join(unknown)}. Available: {', '.join(self.measures)}")
+        return measures, [self.measures.index(m) for m in measures]
+
+    def range(self, start=None, end=None, measures=None):
+        """Totals over [start, end), with both bounds rounded down to the hour: O(1)"""
+        measures, columns = self._columns(measures)
+        low = self._position(start) if start is not None else 0
+        high = self._position(end) if end is not None else self.n_buckets
+        high = max(high, low)
+        totals = self.cumulative[high, columns] - self.cumulative[low, columns]
+        return {m: int(round(v)) if m in COUNT_MEASURES else float(v) for m, v in zip(measures, totals)}
+
+    def resample(self, freq='D', start=None, end=None, measures=None):
+        """Totals per period ('h', '6h', 'D', 'W-MON', 'MS', ...): O(number of periods)"""
+        measures, columns = self._columns(measures)
+        start = max(pd.Timestamp(start), self.start) if start is not None else self.start
+        end = min(pd.Timestamp(end), self.end) if end is not None else self.end
+        if end <= start:
+            return pd.DataFrame(columns=measures, index=pd.DatetimeIndex([], name='period'))
+
+        offset = pd.tseries.frequencies.to_offset(freq)
+        try:
+            too_fine = pd.Timedelta(offset) < BUCKET
+        except ValueError:
+            too_fine = False
+        if too_fine:
+            raise ValueError(f"Frequency {freq} is finer than the hourly buckets of the index")
+        try:
+            first = start.floor(freq)
+        except ValueError:
+            # Anchored frequencies (weeks, months, quarters) cannot be floored directly
+            first = offset.rollback(start.normalize())
+        edges = pd.date_range(first, end, freq=freq)
+        if edges[-1] < end:
+            edges = edges.append(pd.DatetimeIndex([edges[-1] + offset]))
+
+        positions = np.clip(((edges - self.start) // BUCKET).to_numpy(np.int64), 0, self.n_buckets)
+        # Periods straddling the requested bounds only count the requested part
+        positions[0] = self._position(start)
+        positions[-1] = self._position(end)
+        totals = pd.DataFrame(np.diff(self.cumulative[positions][:, columns], axis=0), columns=measures,
+                              index=pd.DatetimeIndex(edges[:-1], name='period'))
+        counts = [m for m in measures if m in COUNT_MEASURES]
+        totals[counts] = totals[counts].round().astype('int64')
+        return totals
+
+    def hourly(self, start=None, end=None, measures=None):
+        """Per-hour totals (the un-accumulated buckets) as a DataFrame indexed by hour"""
+        return self.resample('h', start, end, measures)
+
+
+def time_index_is_fresh(source_file=CLEANED_FILE, path=TIME_INDEX_FILE):
+    """True when the saved index exists and is newer than the cleaned dataset"""
+    if not (os.path.exists(path) and os.path.exists(_metadata_file(path))):
+        return False
+    if not os.path.exists(source_file):
+        return True
+    return os.path.getmtime(path) >= os.path.getmtime(source_file)
+
+
+def load_or_build_time_index(data=None, source_file=CLEANED_FILE, path=TIME_INDEX_FILE, from_source=False):
+    """Index of data, or of source_file reusing the saved index while it is current
+
+    Like load_or_build_aggregates: a DataFrame passed in is indexed as given,
+    without touching the saved index, unless from_source says it was just read
+    from source_file.
+    """
+    if data is not None and not from_source:
+        return TimeIndex.build(data)
+    if time_index_is_fresh(source_file, path):
+        return TimeIndex.load(path)
+    if data is None:
+        data = pd.read_csv(source_file, dtype={'InvoiceNo': str, 'StockCode': str}, parse_dates=['InvoiceDate'])
+    index = TimeIndex.build(data)
+    index.save(path)
+    return index
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Data Visualization Stage for Online Retail Dataset
+Creates various visualizations using plotnine
+
+Each chart is an independent plot job: its small frame is derived in the
+main process from the shared sales cube (see aggregation.py), then a
+process pool renders the charts in parallel. Distribution charts are
+pre-binned with NumPy (see binning.py), so render time does not depend on
+the number of rows.
+"""
+
+import pandas as pd
+import numpy as np
+from plotnine import *
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .aggregation import load_or_build_aggregates, rollup
+from .binning import box_stats, density_grid, group_kde, histogram_bins, kde_grid
+from .config import CLEANED_FILE
+from .instrumentation import StageTrace
+from .time_index import load_or_build_time_index
+
+OUTPUT_DIR = 'output/visualizations'
+DPI = 300
+
+day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+time_order = ['Morning', 'Afternoon', 'Evening', 'Night']
+
+
+# 1. Histogram - Distribution of Total Revenue
+def prepare_histogram_revenue(data, cube, products, time_index):
+    # Bin in NumPy so the worker only receives 50 bars instead of every transaction
+    rev_99 = data['TotalRevenue'].quantile(0.99)
+    return histogram_bins(data.loc[data['TotalRevenue'] <= rev_99, 'TotalRevenue'], bins=50)
+
+
+def build_histogram_revenue(frame):
+    return (ggplot(frame, aes(x='center', y='count'))
+            + geom_col(width=frame['width'].iloc[0], fill='#0072b2', color='black')
+            + xlab('Total Revenue per Transaction ($)')
+            + ylab('Frequency')
+            + ggtitle('Distribution of Total Revenue per Transaction (<= 99th percentile)')
+            + theme(figure_size=(10, 6)))
+
+
+# 2. Box Plot - Revenue by Time of Day
+# Box statistics are computed over every row; outlier points are not drawn
+def prepare_boxplot_revenue_by_time(data, cube, products, time_index):
+    stats = box_stats(data['TotalRevenue'], data['TimeOfDay']).rename(columns={'group': 'TimeOfDay'})
+    stats['TimeOfDay'] = pd.Categorical(stats['TimeOfDay'], categories=time_order, ordered=True)
+    return stats
+
+
+def build_boxplot_revenue_by_time(stats):
+    return (ggplot(stats, aes(x='TimeOfDay', lower='lower', upper='upper', middle='middle',
+                              ymin='ymin', ymax='ymax', fill='TimeOfDay')) +
+            geom_boxplot(stat='identity') +
+            xlab('Time of Day') +
+            ylab('Total Revenue ($)') +
+            ggtitle('Distribution of Revenue by Time of Day (outliers not shown)') +
+            theme(figure_size=(10, 6))
+           )
+
+
+# 3. Box Plot - Revenue by Day of Week
+def prepare_boxplot_revenue_by_day(data, cube, products, time_index):
+    stats = box_stats(data['TotalRevenue'], data['DayOfWeek']).rename(columns={'group': 'DayOfWeek'})
+    stats['DayOfWeek'] = pd.Categorical(stats['DayOfWeek'], categories=day_order, ordered=True)
+    return stats
+
+
+def build_boxplot_revenue_by_day(stats):
+    return (ggplot(stats, aes(x='DayOfWeek', lower='lower', upper='upper', middle='middle',
+                              ymin='ymin', ymax='ymax', fill='DayOfWeek')) +
+            geom_boxplot(stat='identity') +
+            xlab('Day of Week') +
+            ylab('Total Revenue ($)') +
+            ggtitle('Distribution of Revenue by Day of Week (outliers not shown)') +
+            theme(figure_size=(12, 6), axis_text_x=element_text(angle=45, hjust=1))
+           )
+
+
+# 4. Column Chart - Total Sales by Day of Week
+def prepare_column_sales_by_day(data, cube, products, time_index):
+    daily_sales = rollup(cube, 'DayOfWeek')
+    daily_sales['DayOfWeek'] = pd.Categorical(daily_sales['DayOfWeek'], categories=day_order, ordered=True)
+    return daily_sales.sort_values('DayOfWeek')
+
+
+def build_column_sales_by_day(daily_sales):
+    return (ggplot(daily_sales, aes(x='DayOfWeek', y='TotalRevenue', fill='DayOfWeek')) +
+            geom_col() +
+            geom_text(aes(label=daily_sales['TotalRevenue'].round(0)), nudge_y=daily_sales['TotalRevenue'].max() * 0.01) +
+            xlab('Day of Week') +
+            ylab('Total Revenue ($)') +
+            labs(fill='Day of Week') +
+            ggtitle('Total Sales Revenue by Day of Week') +
+            theme(figure_size=(12, 6), axis_text_x=element_text(angle=45, hjust=1))
+           )
+
+
+# 5. Column Chart - Total Sales by Time of Day
+def prepare_column_sales_by_time(data, cube, products, time_index):
+    time_sales = rollup(cube, 'TimeOfDay')
+    time_sales['TimeOfDay'] = pd.Categorical(time_sales['TimeOfDay'], categories=time_order, ordered=True)
+    return time_sales.sort_values('TimeOfDay')
+
+
+def build_column_sales_by_time(time_sales):
+    return (ggplot(time_sales, aes(x='TimeOfDay', y='TotalRevenue', fill='TimeOfDay')) +
+            geom_col() +
+            geom_text(aes(label=time_sales['TotalRevenue'].round(0)), nudge_y=time_sales['TotalRevenue'].max() * 0.01) +
+            xlab('Time of Day') +
+            ylab('Total Revenue ($)') +
+            labs(fill='Time of Day') +
+            ggtitle('Total Sales Revenue by Time of Day') +
+            theme(figure_size=(10, 6))
+           )
+
+
+# 6. Line Chart - Sales Over Time
+# Monthly totals are one prefix-sum lookup per month (see time_index.py)
+def prepare_line_sales_over_time(data, cube, products, time_index):
+    monthly = time_index.resample('MS', measures=['revenue', 'net_revenue'])
+    months = monthly.index.strftime('%Y-%m')
+    # Gross revenue and revenue net of matched returns, one line each
+    return pd.DataFrame({'InvoiceDate': np.concatenate([months, months]),
+                         'TotalRevenue': np.concatenate([monthly['revenue'], monthly['net_revenue']]),
+                         'Revenue': pd.Categorical(['Gross'] * len(months) + ['Net of returns'] * len(months))})
+
+
+def build_line_sales_over_time(monthly_sales):
+    return (ggplot(monthly_sales, aes(x='InvoiceDate', y='TotalRevenue', color='Revenue', group='Revenue')) +
+            geom_line(size=1) +
+            geom_point(size=2) +
+            scale_color_manual(values=['blue', 'darkorange']) +
+            xlab('Month') +
+            ylab('Total Revenue ($)') +
+            ggtitle('Total Sales Revenue Over Time (gross and net of returns)') +
+            theme(figure_size=(12, 6), axis_text_x=element_text(angle=45, hjust=1))
+           )
+
+
+# 7. Scatter Plot - Quantity vs Unit Price
+# Every row (within the 99th percentiles) is binned into a density raster instead of sampling 10k points
+def prepare_scatter_price_quantity(data, cube, products, time_index):
+    # Cap at 99th percentile to remove crazy outliers
+    price_99 = data['UnitPrice'].quantile(0.99)
+    qty_99 = data['Quantity'].quantile(0.99)
+
+    data_filtered = data[(data['UnitPrice'] <= price_99) &
+                         (data['Quantity'] <= qty_99)]
+
+    grid = density_grid(data_filtered['UnitPrice'], data_filtered['Quantity'], bins=80)
+    # Least-squares line over all filtered rows (what geom_smooth(method='lm') drew)
+    slope, intercept = np.polyfit(data_filtered['UnitPrice'], data_filtered['Quantity'], 1)
+    grid['slope'] = slope
+    grid['intercept'] = intercept
+    return grid
+
+
+def build_scatter_price_quantity(grid):
+    return (ggplot(grid, aes(x='x', y='y', fill='count')) +
+            geom_tile(aes(width='width', height='height')) +
+            geom_abline(slope=grid['slope'].iloc[0], intercept=grid['intercept'].iloc[0], color='red') +
+            scale_fill_gradient(low='lightblue', high='darkblue', trans='log10') +
+            xlab('Unit Price ($)') +
+            ylab('Quantity') +
+            labs(fill='Transactions') +
+            ggtitle('Relationship Between Unit Price and Quantity') +
+            theme(figure_size=(10, 6)))
+
+
+# 8. Top 10 Countries by Revenue
+def prepare_column_top_countries(data, cube, products, time_index):
+    country_revenue = rollup(cube, 'Country').sort_values('TotalRevenue', ascending=False).head(10)
+    # Sort for proper ordering in plot
+    return country_revenue.sort_values('TotalRevenue', ascending=True)
+
+
+def build_column_top_countries(country_revenue):
+    return (ggplot(country_revenue, aes(x='Country', y='TotalRevenue', fill='Country')) +
+            geom_col() +
+            coord_flip() +
+            xlab('Country') +
+            ylab('Total Revenue ($)') +
+            labs(fill='Country') +
+            ggtitle('Top 10 Countries by Total Revenue') +
+            theme(figure_size=(10, 6))
+           )
+
+
+# 9. Density Plot - Distribution of Unit Prices
+def prepare_density_unit_price(data, cube, products, time_index):
+    # A few very expensive items would squash the curve into the first grid cell
+    price_99 = data['UnitPrice'].quantile(0.99)
+    return kde_grid(data.loc[data['UnitPrice'] <= price_99, 'UnitPrice'], grid_size=512)
+
+
+def build_density_unit_price(kde):
+    return (ggplot(kde, aes(x='x', y='density')) +
+            geom_area(fill='blue', alpha=0.5) +
+            geom_line(color='black') +
+            xlab('Unit Price ($)') +
+            ylab('Density') +
+            ggtitle('Distribution of Unit Prices (<= 99th percentile)') +
+            theme(figure_size=(10, 6))
+           )
+
+
+# 10. Violin Plot - Revenue Distribution by Country (Top 5)
+def prepare_violin_revenue_by_country(data, cube, products, time_index):
+    top_5_countries = rollup(cube, 'Country').nlargest(5, 'TotalRevenue')['Country'].tolist()
+    rev_99 = data['TotalRevenue'].quantile(0.99)
+    data_top5 = data[data['Country'].isin(top_5_countries) & (data['TotalRevenue'] <= rev_99)]
+
+    kde = group_kde(data_top5['TotalRevenue'], data_top5['Country'], grid_size=256)
+    stats = box_stats(data_top5['TotalRevenue'], data_top5['Country'])
+    # Violins are drawn as polygons mirrored around each country's x position
+    positions = {country: i + 1 for i, country in enumerate(top_5_countries)}
+    kde['half_width'] = 0.45 * kde['density'] / kde.groupby('group')['density'].transform('max')
+    kde['pos'] = kde['group'].map(positions)
+    outline = pd.concat([kde.assign(x=kde['pos'] - kde['half_width']),
+                         kde.iloc[::-1].assign(x=kde['pos'].iloc[::-1] + kde['half_width'].iloc[::-1])])
+    outline = outline.sort_values('group', kind='stable')
+    stats['pos'] = stats['group'].map(positions)
+    return outline[['group', 'x', 'y']].assign(kind='violin'), stats.assign(kind='box'), top_5_countries
+
+
+def build_violin_revenue_by_country(frames):
+    outline, stats, countries = frames
+    return (ggplot() +
+            geom_polygon(outline, aes(x='x', y='y', fill='group', group='group'), color='black') +
+            geom_boxplot(stats, aes(x='pos', lower='lower', upper='upper', middle='middle',
+                                    ymin='ymin', ymax='ymax', group='group'),
+                         stat='identity', fill='white', width=0.1) +
+            scale_x_continuous(breaks=list(range(1, len(countries) + 1)), labels=countries) +
+            xlab('Country') +
+            ylab('Total Revenue ($)') +
+            labs(fill='Country') +
+            ggtitle('Revenue Distribution by Top 5 Countries (<= 99th percentile)') +
+            theme(figure_size=(12, 6), axis_text_x=element_text(angle=45, hjust=1))
+           )
+
+
+# 11. Top 20 Products by Revenue
+def prepare_column_top_products(data, cube, products, time_index):
+    product_revenue = products.nlargest(20, 'TotalRevenue')[['StockCode', 'Description_imputed', 'TotalRevenue']]
+    product_revenue['Product'] = product_revenue['StockCode'] + ' - ' + product_revenue['Description_imputed'].str[:30]
+    # Sort for proper ordering in plot
+    return product_revenue.sort_values('TotalRevenue', ascending=True)
+
+
+def build_column_top_products(product_revenue):
+    return (ggplot(product_revenue, aes(x='Product', y='TotalRevenue', fill='TotalRevenue')) +
+            geom_col() +
+            coord_flip() +
+            scale_fill_gradient(low='lightblue', high='darkblue') +
+            xlab('Product') +
+            ylab('Total Revenue ($)') +
+            labs(fill='Revenue') +
+            ggtitle('Top 20 Products by Total Revenue') +
+            theme(figure_size=(12, 8))
+           )
+
+
+# 12. Heatmap - Sales by Day of Week and Time of Day
+def prepare_heatmap_day_time(data, cube, products, time_index):
+    heatmap_data = rollup(cube, ['DayOfWeek', 'TimeOfDay'])
+    heatmap_data['DayOfWeek'] = pd.Categorical(heatmap_data['DayOfWeek'], categories=day_order, ordered=True)
+    heatmap_data['TimeOfDay'] = pd.Categorical(heatmap_data['TimeOfDay'], categories=time_order, ordered=True)
+    return heatmap_data
+
+
+def build_heatmap_day_time(heatmap_data):
+    return (ggplot(heatmap_data, aes(x='DayOfWeek', y='TimeOfDay', fill='TotalRevenue')) +
+            geom_tile() +
+            geom_text(aes(label=heatmap_data['TotalRevenue'].round(0)), size=8) +
+            scale_fill_gradient(low='deepskyblue', high='darksalmon') +
+            xlab('Day of Week') +
+            ylab('Time of Day') +
+            labs(fill='Total Revenue ($)') +
+            ggtitle('Heatmap of Sales Revenue by Day of Week and Time of Day') +
+            theme(figure_size=(12, 6), axis_text_x=element_text(angle=45, hjust=1))
+           )
+
+
+# Plot registry: (name, output file, description, prepare(data, cube, products, time_index) -> small frame,
+# build(frame) -> ggplot)
+PLOTS = [
+    ('histogram_revenue', '1_histogram_revenue.png', 'Histogram: Distribution of Total Revenue',
+     prepare_histogram_revenue, build_histogram_revenue),
+    ('boxplot_revenue_by_time', '2_boxplot_revenue_by_time.png', 'Box plot: Revenue by Time of Day',
+     prepare_boxplot_revenue_by_time, build_boxplot_revenue_by_time),
+    ('boxplot_revenue_by_day', '3_boxplot_revenue_by_day.png', 'Box plot: Revenue by Day of Week',
+     prepare_boxplot_revenue_by_day, build_boxplot_revenue_by_day),
+    ('column_sales_by_day', '4_column_sales_by_day.png', 'Column chart: Total Sales by Day of Week',
+     prepare_column_sales_by_day, build_column_sales_by_day),
+    ('column_sales_by_time', '5_column_sales_by_time.png', 'Column chart: Total Sales by Time of Day',
+     prepare_column_sales_by_time, build_column_sales_by_time),
+    ('line_sales_over_time', '6_line_sales_over_time.png', 'Line chart: Sales Over Time',
+     prepare_line_sales_over_time, build_line_sales_over_time),
+    ('scatter_price_quantity', '7_scatter_price_quantity.png', 'Scatter plot: Quantity vs Unit Price',
+     prepare_scatter_price_quantity, build_scatter_price_quantity),
+    ('column_top_countries', '8_column_top_countries.png', 'Column chart: Top 10 Countries by Revenue',
+     prepare_column_top_countries, build_column_top_countries),
+    ('density_unit_price', '9_density_unit_price.png', 'Density plot: Distribution of Unit Prices',
+     prepare_density_unit_price, build_density_unit_price),
+    ('violin_revenue_by_country', '10_violin_revenue_by_country.png', 'Violin plot: Revenue Distribution by Top 5 Countries',
+     prepare_violin_revenue_by_country, build_violin_revenue_by_country),
+    ('column_top_products', '11_column_top_products.png', 'Column chart: Top 20 Products by Revenue',
+     prepare_column_top_products, build_column_top_products),
+    ('heatmap_day_time', '12_heatmap_day_time.png', 'Heatmap: Sales by Day of Week and Time of Day',
+     prepare_heatmap_day_time, build_heatmap_day_time),
+]
+
+
+def get_plot(name):
+    """Look up a plot job by name"""
+    for entry in PLOTS:
+        if entry[0] == name:
+            return entry
+    raise KeyError(f"Unknown plot: {name}. Available: {', '.join(p[0] for p in PLOTS)}")
+
+
+def render_plot(name, frame, output_dir=OUTPUT_DIR, dpi=DPI):
+    """Build and save one chart from its pre-aggregated frame (runs in a worker process)"""
+    start = time.perf_counter()
+    _, filename, _, _, build = get_plot(name)
+    path = os.path.join(output_dir, filename)
+    build(frame).save(path, dpi=dpi, verbose=False)
+    return name, path, time.perf_counter() - start
+
+
+def render_all(jobs, workers, output_dir=OUTPUT_DIR, dpi=DPI):
+    """Render (name, frame) jobs, in parallel when more than one worker is allowed"""
+    if workers <= 1 or len(jobs) <= 1:
+        for name, frame in jobs:
+            yield render_plot(name, frame, output_dir, dpi)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [pool.submit(render_plot, name, frame, output_dir, dpi) for name, frame in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def visualize(data=None, plots=None, workers=None, dpi=DPI, output_dir=OUTPUT_DIR):
+    """Render the charts (all, or the named plots) from the cleaned DataFrame
+
+    The cleaned CSV is read when no DataFrame is passed in.
+    """
+    selected = [get_plot(name) for name in plots] if plots else PLOTS
+    workers = workers or os.cpu_count() or 1
+
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    trace = StageTrace('visualization')
+
+    # The persisted aggregates and time index can only stand in for data read from the cleaned CSV
+    from_csv = data is None
+    if from_csv:
+        with trace.span('load_csv') as span:
+            print("Loading cleaned dataset...")
+            # Load the cleaned dataset
+            data = pd.read_csv(CLEANED_FILE, dtype={'InvoiceNo': str, 'StockCode': str})
+            data['InvoiceDate'] = pd.to_datetime(data['InvoiceDate'])
+            span['rows'] = len(data)
+
+    print(f"Dataset shape: {data.shape}")
+
+    # One pass over the full data; every aggregate chart is derived from the cube
+    with trace.span('aggregate_cube', rows=len(data)):
+        cube, products = load_or_build_aggregates(data, CLEANED_FILE, from_source=from_csv)
+    print(f"Sales cube: {len(cube):,} cells, product rollup: {len(products):,} products")
+
+    with trace.span('time_index', rows=len(data)):
+        time_index = load_or_build_time_index(data, CLEANED_FILE, from_source=from_csv)
+    print(f"Time index: {time_index.n_buckets:,} hourly buckets")
+
+    jobs = []
+    for name, filename, description, prepare, _ in selected:
+        with trace.span(f'prepare:{name}'):
+            print(f"Preparing {description}...")
+            jobs.append((name, prepare(data, cube, products, time_index)))
+
+    print(f"\nRendering {len(jobs)} plots with {min(workers, len(jobs))} worker(s)...")
+    paths = []
+    with trace.span('render'):
+        for name, path, seconds in render_all(jobs, workers, output_dir, dpi):
+            trace.record(f'render:{name}', seconds, depth=1)
+            print(f"Saved: {path} ({seconds:.2f}s)")
+            paths.append(path)
+
+    print("\n=== All Visualizations Complete ===")
+    print(f"All visualizations saved to: {output_dir}/")
+
+    trace.finish()
+    return paths
@@ -6,57 +6,97 @@ Main execution script
 Runs all analysis steps in sequence
 """
 
-import subprocess
-import sys
+import argparse
 import os
+import time
+import traceback
+from datetime import datetime
 
-def run_script(script_name, description):
-    """Run a Python script and handle errors"""
+import retail_pipeline
+from retail_pipeline.config import CLEANED_FILE, RAW_FILE
+from retail_pipeline.ingestion import discover_files
+from retail_pipeline.instrumentation import (PROFILE_ENV, RUN_ID_ENV, TRACEMALLOC_ENV, TRACE_DIR,
+                                             load_traces, print_run_breakdown)
+
+def run_stage(function_name, description, *args):
+    """Run a pipeline stage in this process and handle errors; returns (success, result)"""
     print(f"\n{'='*60}")
     print(f"Running: {description}")
-    print(f"Script: {script_name}")
+    print(f"Stage: retail_pipeline.{function_name}()")
     print(f"{'='*60}\n")
     
     try:
-        result = subprocess.run([sys.executable, script_name], 
-                              check=True, 
-                              capture_output=False)
+        # The stage module (and the libraries it needs) is imported here on first use
+        stage = getattr(retail_pipeline, function_name)
+        result = stage(*args)
         print(f"\n✓ {description} completed successfully")
-        return True
-    except subprocess.CalledProcessError as e:
+        return True, result
+    except Exception as e:
         print(f"\n✗ Error in {description}")
-        print(f"Error code: {e.returncode}")
-        return False
-    except FileNotFoundError:
-        print(f"\n✗ Script not found: {script_name}")
-        return False
+        traceback.print_exc()
+        return False, None
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description='Run the Online Retail analysis pipeline')
+    parser.add_argument('--input', default=RAW_FILE,
+                        help='Raw dataset to clean: a .xlsx, .csv or .csv.gz file, a directory of them '
+                             "or a quoted glob such as 'extracts/2011-*.xlsx'")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes used to parse multiple input files (default: one per core)')
+    parser.add_argument('--profile', nargs='+', default=[],
+                        choices=['all', 'cleaning', 'visualization', 'customers', 'import', 'queries'],
+                        help='Stages to run under cProfile (dumps go to output/profiles/)')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Also track peak Python allocations in the stage traces (slows the stages)')
+    args = parser.parse_args()
+    
     print("="*60)
     print("Online Retail Data Analysis Pipeline")
     print("="*60)
     
     # Check if dataset exists
-    if not os.path.exists('Online Retail.xlsx'):
-        print("\n✗ Error: Online Retail.xlsx not found!")
-        print("Please ensure the dataset is in the current directory.")
+    try:
+        raw_files = discover_files(args.input)
+    except FileNotFoundError as e:
+        print(f"\n✗ Error: {e}")
+        print("Please ensure the dataset is in the current directory or pass it with --input.")
         return
+    print(f"Raw data: {len(raw_files)} file(s) from {args.input}")
     
     # Create output directory
     os.makedirs('output', exist_ok=True)
     
-    scripts = [
-        ('1_data_cleaning.py', 'Data Cleaning'),
-        ('2_data_visualization.py', 'Data Visualization'),
-        ('3_database_import.py', 'Database Import'),
-        ('4_sql_queries.py', 'SQL Queries and Business Analysis')
+    # Every stage writes output/traces/<stage>.json tagged with this run id
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    os.environ[RUN_ID_ENV] = run_id
+    if args.profile:
+        os.environ[PROFILE_ENV] = ','.join(args.profile)
+    if args.tracemalloc:
+        os.environ[TRACEMALLOC_ENV] = '1'
+    
+    # Stages run in this process; the cleaned DataFrame is handed on instead of re-read from CSV
+    stages = [
+        ('clean', 'Data Cleaning', 'cleaning'),
+        ('visualize', 'Data Visualization', 'visualization'),
+        ('analyze_customers', 'Customer Analytics', 'customers'),
+        ('load_db', 'Database Import', 'import'),
+        ('run_queries', 'SQL Queries and Business Analysis', 'queries')
     ]
     
     results = []
-    for script, description in scripts:
-        success = run_script(script, description)
-        results.append((script, description, success))
+    wall_seconds = {}
+    data = None
+    for function_name, description, stage in stages:
+        start = time.perf_counter()
+        if function_name == 'clean':
+            success, data = run_stage(function_name, description, args.input, CLEANED_FILE, args.workers)
+        elif function_name == 'run_queries':
+            success, _ = run_stage(function_name, description)
+        else:
+            success, _ = run_stage(function_name, description, data)
+        wall_seconds[stage] = time.perf_counter() - start
+        results.append((function_name, description, success))
         
         if not success:
             print(f"\n⚠ Warning: {description} failed. Continuing with next step...")
@@ -70,9 +110,21 @@ def main():
     print("Pipeline Execution Summary")
     print("="*60)
     
-    for script, description, success in results:
+    for function_name, description, success in results:
         status = "✓ Success" if success else "✗ Failed"
-        print(f"{status}: {description} ({script})")
+        print(f"{status}: {description} ({function_name})")
+    
+    # Aggregated timing breakdown from the stage traces
+    traces = load_traces(run_id)
+    if traces:
+        print("\n" + "="*60)
+        print("Time Breakdown")
+        print("="*60)
+        stage_order = [stage for _, _, stage in stages]
+        traces.sort(key=lambda t: stage_order.index(t['stage']) if t['stage'] in stage_order else len(stage_order))
+        traced = {t['stage'] for t in traces}
+        print_run_breakdown(traces, {stage: s for stage, s in wall_seconds.items() if stage in traced},
+                            summary_file=os.path.join(TRACE_DIR, 'run_summary.json'))
     
     print("\n" + "="*60)
     print("All output files are in the 'output/' directory")
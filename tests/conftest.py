@@ -0,0 +1,49 @@
+# coding: utf-8
+
+"""Shared fixtures: small seeded datasets, with every output/ path under a temporary directory"""
+
+import os
+import sys
+
+import pytest
+
+# The tests import the scripts at the repository root (generate_synthetic_data) and the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_synthetic_data import generate_retail_data, write_dataset  # noqa: E402
+
+SEED = 7
+ROWS = 4000
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in an empty directory so output/ files never touch the checkout"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope='session')
+def raw_data():
+    return generate_retail_data(ROWS, seed=SEED)
+
+
+@pytest.fixture(scope='session')
+def cleaned_data(raw_data, tmp_path_factory):
+    """raw_data run through the cleaning stage (in its own directory); tests get a copy"""
+    from retail_pipeline import clean
+
+    directory = tmp_path_factory.mktemp('cleaned')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        write_dataset(raw_data, 'raw.csv')
+        data = clean('raw.csv', output_file=None, workers=1)
+    finally:
+        os.chdir(cwd)
+    return data
+
+
+@pytest.fixture
+def cleaned(cleaned_data):
+    return cleaned_data.copy()
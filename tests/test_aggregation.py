@@ -0,0 +1,76 @@
+# coding: utf-8
+
+import os
+
+import pandas as pd
+import pytest
+
+from retail_pipeline import visualization
+from retail_pipeline.aggregation import (CUBE_FILE, build_product_rollup, build_sales_cube,
+                                         load_or_build_aggregates, rollup, save_aggregates)
+from retail_pipeline.config import CLEANED_FILE
+
+
+def by_country(cube):
+    return rollup(cube, 'Country').set_index('Country')['TotalRevenue'].sort_index()
+
+
+@pytest.fixture
+def subset(cleaned):
+    """A non-UK subset of the cleaned data, next to aggregates persisted from all of it"""
+    save_aggregates(build_sales_cube(cleaned), build_product_rollup(cleaned))
+    return cleaned[cleaned['Country'] != 'United Kingdom']
+
+
+def test_passed_dataframe_is_aggregated_when_the_cache_looks_fresh(subset):
+    # No cleaned CSV at all: the cache counts as fresh for the CSV path
+    assert not os.path.exists(CLEANED_FILE)
+    cube, products = load_or_build_aggregates(subset)
+    pd.testing.assert_series_equal(by_country(cube), by_country(build_sales_cube(subset)))
+    assert products['TotalRevenue'].sum() == pytest.approx(subset['TotalRevenue'].sum())
+
+
+def test_passed_dataframe_is_aggregated_over_an_older_csv(subset, cleaned):
+    cleaned.to_csv(CLEANED_FILE, index=False)
+    os.utime(CLEANED_FILE, (0, 0))
+    cube, _ = load_or_build_aggregates(subset)
+    assert 'United Kingdom' not in by_country(cube).index
+
+
+def test_persisted_aggregates_stand_in_for_the_csv(subset, cleaned):
+    cleaned.to_csv(CLEANED_FILE, index=False)
+    os.utime(CLEANED_FILE, (0, 0))
+    modified = os.path.getmtime(CUBE_FILE)
+    cube, _ = load_or_build_aggregates()
+    assert os.path.getmtime(CUBE_FILE) == modified
+    pd.testing.assert_series_equal(by_country(cube), by_country(build_sales_cube(cleaned)),
+                                   check_exact=False)
+
+
+def test_visualize_charts_the_dataframe_passed_in(subset, monkeypatch):
+    jobs = {}
+
+    def capture(rendered, workers, output_dir, dpi):
+        jobs.update(rendered)
+        return iter([])
+
+    monkeypatch.setattr(visualization, 'render_all', capture)
+    visualization.visualize(subset, plots=['column_top_countries'], workers=1)
+
+    countries = jobs['column_top_countries']
+    assert 'United Kingdom' not in countries['Country'].tolist()
+    assert countries['TotalRevenue'].sum() == pytest.approx(
+        subset.groupby('Country')['TotalRevenue'].sum().nlargest(10).sum())
+
+
+def test_clean_persists_the_aggregates(raw_data, workdir):
+    from generate_synthetic_data import write_dataset
+    from retail_pipeline import clean
+    from retail_pipeline.aggregation import aggregates_are_fresh, load_aggregates
+
+    write_dataset(raw_data, 'raw.csv')
+    data = clean('raw.csv', workers=1)
+    assert aggregates_are_fresh()
+    cube, products = load_aggregates()
+    pd.testing.assert_series_equal(by_country(cube), by_country(build_sales_cube(data)), check_exact=False)
+    assert products['TotalRevenue'].sum() == pytest.approx(data['TotalRevenue'].sum())
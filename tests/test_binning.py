@@ -0,0 +1,52 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from retail_pipeline.binning import box_stats, histogram_bins, kde_grid, scott_bandwidth
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(5)
+    return np.concatenate([rng.lognormal(2, 0.8, 5000), rng.lognormal(5, 0.3, 40)])
+
+
+def test_box_stats_match_numpy(values):
+    groups = np.where(np.arange(len(values)) % 3 == 0, 'a', 'b')
+    stats = box_stats(values, groups).set_index('group')
+    for group in ['a', 'b']:
+        subset = values[groups == group]
+        q1, median, q3 = np.percentile(subset, [25, 50, 75])
+        inside = subset[(subset >= q1 - 1.5 * (q3 - q1)) & (subset <= q3 + 1.5 * (q3 - q1))]
+        row = stats.loc[group]
+        assert (row['lower'], row['middle'], row['upper']) == pytest.approx((q1, median, q3))
+        assert row['ymin'] == inside.min()
+        assert row['ymax'] == inside.max()
+        assert row['n'] == len(subset)
+        assert row['outliers'] == len(subset) - len(inside)
+
+
+def test_box_stats_skip_missing_values_and_groups():
+    stats = box_stats([1.0, np.nan, 3.0, 5.0, 7.0], pd.Series(['x', 'x', None, 'x', 'x']))
+    assert stats['group'].tolist() == ['x']
+    assert stats['n'].tolist() == [3]
+    assert stats['middle'].tolist() == [5.0]
+
+
+def test_kde_grid_matches_scipy(values):
+    stats = pytest.importorskip('scipy.stats')
+    kde = kde_grid(values, grid_size=512)
+    bandwidth = scott_bandwidth(values)
+    reference = stats.gaussian_kde(values, bw_method=bandwidth / values.std(ddof=1))(kde['x'])
+    # Linear binning moves each value by at most one grid step, far below the bandwidth
+    assert np.abs(kde['density'] - reference).max() < 0.01 * reference.max()
+    assert kde['density'].sum() * (kde['x'][1] - kde['x'][0]) == pytest.approx(1, abs=1e-3)
+
+
+def test_histogram_bins_match_numpy(values):
+    counts, edges = np.histogram(values, bins=20)
+    bins = histogram_bins(np.append(values, np.nan), bins=20)
+    assert bins['count'].tolist() == counts.tolist()
+    assert np.allclose(bins['left'], edges[:-1]) and np.allclose(bins['right'], edges[1:])
@@ -0,0 +1,62 @@
+# coding: utf-8
+
+import pandas as pd
+import pytest
+
+from retail_pipeline.canonical import (SIMILARITY_THRESHOLD, apply_canonical_mapping, build_canonical_mapping,
+                                       jaccard, load_or_build_canonical_mapping, near_duplicate_groups,
+                                       normalize_description, trigrams)
+
+COUNTS = pd.DataFrame({
+    'StockCode': ['A1', 'A2', 'B1', 'B2', 'C1', 'C2', 'D1'],
+    'Description': ['SET OF 3 CAKE TINS PANTRY DESIGN', 'SET OF 6 CAKE TINS PANTRY DESIGN',
+                    'RED RETROSPOT LUNCH BAG', 'RED RETROSPOT LUNCH BAGG',
+                    "50'S CHRISTMAS GIFT BAG LARGE", "60'S CHRISTMAS GIFT BAG LARGE",
+                    'JUMBO BAG RED RETROSPOT'],
+    'lines': [10, 5, 20, 3, 4, 6, 8],
+})
+
+
+def canonical_codes(mapping):
+    return mapping.set_index('StockCode')['CanonicalStockCode'].to_dict()
+
+
+@pytest.mark.parametrize('first, second', [(0, 1), (4, 5)])
+def test_descriptions_whose_numbers_differ_are_not_merged(first, second):
+    texts = normalize_description(COUNTS['Description']).tolist()
+    # Similar enough on trigrams alone, so only the number check keeps them apart
+    assert jaccard(trigrams(texts[first]), trigrams(texts[second])) >= SIMILARITY_THRESHOLD
+    groups = near_duplicate_groups(texts)
+    assert groups[first] != groups[second]
+
+
+def test_near_duplicates_merge_into_the_busiest_code():
+    codes = canonical_codes(build_canonical_mapping(COUNTS))
+    assert codes['B2'] == 'B1'
+    assert {codes[c] for c in ['A1', 'A2', 'C1', 'C2', 'D1']} == {'A1', 'A2', 'C1', 'C2', 'D1'}
+
+
+def test_most_frequent_description_represents_a_code():
+    counts = pd.DataFrame({'StockCode': ['X', 'X'], 'Description': ['PINK OWL MUG', 'PINK OWL MUG ?'],
+                           'lines': [2, 9]})
+    mapping = build_canonical_mapping(counts)
+    assert mapping['CanonicalDescription'].tolist() == ['PINK OWL MUG ?']
+
+
+def test_mapping_is_cached_by_fingerprint():
+    data = COUNTS.loc[COUNTS.index.repeat(COUNTS['lines']), ['StockCode', 'Description']]
+    mapping, cached = load_or_build_canonical_mapping(data)
+    assert not cached
+    again, cached = load_or_build_canonical_mapping(data)
+    assert cached
+    pd.testing.assert_frame_equal(again, mapping)
+    _, cached = load_or_build_canonical_mapping(data.iloc[1:])
+    assert not cached
+
+
+def test_apply_keeps_the_original_code():
+    data = pd.DataFrame({'StockCode': ['B2', 'D1', 'Z9'], 'Description_imputed': ['x', 'y', 'z']})
+    data = apply_canonical_mapping(data, build_canonical_mapping(COUNTS))
+    assert data['StockCode'].tolist() == ['B1', 'D1', 'Z9']
+    assert data['StockCodeOriginal'].tolist() == ['B2', 'D1', 'Z9']
+    assert data['Description_imputed'].tolist() == ['RED RETROSPOT LUNCH BAG', 'JUMBO BAG RED RETROSPOT', 'z']
@@ -0,0 +1,80 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from retail_pipeline.customers import cohort_retention, customer_months, rfm_scores
+
+
+@pytest.fixture
+def known(cleaned):
+    return cleaned[cleaned['CustomerID_imputed'] > 0]
+
+
+@pytest.fixture
+def months(cleaned):
+    return customer_months(cleaned)
+
+
+def test_rfm_matches_a_direct_groupby(months, known):
+    rfm = rfm_scores(months).set_index('customer_id').sort_index()
+    direct = known.groupby('CustomerID_imputed').agg(
+        last_purchase=('InvoiceDate', 'max'),
+        frequency=('InvoiceNo', 'nunique'),
+        monetary=('TotalRevenue', 'sum')).sort_index()
+    snapshot = known['InvoiceDate'].max().normalize() + pd.Timedelta(days=1)
+
+    assert rfm.index.tolist() == direct.index.tolist()
+    assert rfm['recency_days'].tolist() == (snapshot - direct['last_purchase']).dt.days.tolist()
+    assert rfm['frequency'].tolist() == direct['frequency'].tolist()
+    np.testing.assert_allclose(rfm['monetary'], direct['monetary'])
+
+
+@pytest.mark.parametrize('score', ['r_score', 'f_score', 'm_score'])
+def test_scores_form_five_equal_groups(months, score):
+    rfm = rfm_scores(months)
+    sizes = rfm[score].value_counts()
+    assert sorted(sizes.index) == [1, 2, 3, 4, 5]
+    assert sizes.max() - sizes.min() <= 1
+
+
+def test_scores_follow_the_ranking(months):
+    rfm = rfm_scores(months)
+    # A higher score never goes with a worse value: recent, frequent and big spenders score high
+    for score, column, sign in [('r_score', 'recency_days', -1), ('f_score', 'frequency', 1),
+                                ('m_score', 'monetary', 1)]:
+        bounds = (sign * rfm[column]).groupby(rfm[score]).agg(['min', 'max'])
+        assert (bounds['max'].values[:-1] <= bounds['min'].values[1:]).all()
+
+
+def test_cohort_retention_matches_a_naive_computation(months, known):
+    month = known['InvoiceDate'].dt.year * 12 + known['InvoiceDate'].dt.month - 1
+    active = {}
+    for customer, m in zip(known['CustomerID_imputed'], month):
+        active.setdefault(customer, set()).add(m)
+
+    expected = {}
+    for customer, customer_months_active in active.items():
+        first = min(customer_months_active)
+        for m in customer_months_active:
+            expected.setdefault((first, m - first), set()).add(customer)
+
+    retention = cohort_retention(months)
+    cohort = [int(year) * 12 + int(month) - 1
+              for year, month in retention['cohort_month'].str.split('-', expand=True).values]
+    result = {(c, offset): customers
+              for c, offset, customers in zip(cohort, retention['month_offset'], retention['customers'])}
+    assert result == {key: len(customers) for key, customers in expected.items()}
+
+    for (c, offset), rate, size in zip(result, retention['retention_rate'], retention['cohort_size']):
+        assert size == len(expected[(c, 0)])
+        assert rate == pytest.approx(len(expected[(c, offset)]) / size)
+
+
+def test_offset_zero_retains_everyone(months):
+    retention = cohort_retention(months)
+    first = retention[retention['month_offset'] == 0]
+    assert (first['retention_rate'] == 1.0).all()
+    assert (first['customers'] == first['cohort_size']).all()
+    assert first['cohort_size'].sum() == months['customer_id'].nunique()
@@ -0,0 +1,96 @@
+# coding: utf-8
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from retail_pipeline.dedup import StreamingDeduplicator, merge_runs, row_digests, sort_digests
+from retail_pipeline.ingestion import RAW_COLUMNS
+
+
+@pytest.fixture
+def with_duplicates(raw_data):
+    """raw_data with a quarter of its rows repeated at random later positions"""
+    rng = np.random.default_rng(1)
+    repeats = raw_data.sample(frac=0.25, random_state=2)
+    data = pd.concat([raw_data, repeats], ignore_index=True)
+    return data.iloc[rng.permutation(len(data))].reset_index(drop=True)
+
+
+def test_keep_mask_matches_pandas_across_spills_and_merges(with_duplicates, workdir):
+    expected = ~with_duplicates.duplicated(subset=RAW_COLUMNS)
+    # Room for 64 digests: every chunk spills and the runs are merged repeatedly
+    with StreamingDeduplicator(memory_budget=64 * 16, spill_dir=str(workdir / 'spill')) as dedup:
+        chunks = np.array_split(np.arange(len(with_duplicates)), 37)
+        keep = np.concatenate([dedup.keep_mask(with_duplicates.iloc[rows]) for rows in chunks])
+        assert dedup.spills > 8
+    assert (keep == expected.to_numpy()).all()
+    assert dedup.duplicates == int((~expected).sum())
+    # Closing removes the spilled runs
+    assert list((workdir / 'spill').iterdir()) == []
+
+
+def test_merge_runs_in_small_blocks(workdir):
+    rng = np.random.default_rng(3)
+    runs = []
+    for i in range(2):
+        # Few distinct high halves, so equal keys straddle the block boundaries
+        hi = rng.integers(0, 1000, 500).astype(np.uint64)
+        hi, lo = sort_digests(hi, rng.integers(0, 2**63, 500).astype(np.uint64))
+        np.save(workdir / f'{i}.npy', np.vstack([hi, lo]))
+        runs.append(np.load(workdir / f'{i}.npy', mmap_mode='r'))
+    merged = merge_runs(runs[0], runs[1], str(workdir / 'merged.npy'), block=64)
+    assert (np.diff(merged[0].astype(np.int64)) >= 0).all()
+    assert sorted(zip(*merged.tolist())) == sorted(zip(*np.hstack(runs).tolist()))
+
+
+def test_missing_text_is_not_the_text_nan(raw_data):
+    rows = raw_data.iloc[[0, 0]].copy()
+    rows['Description'] = [np.nan, 'nan']
+    hi, lo = row_digests(rows)
+    assert hi[0] != hi[1] and lo[0] != lo[1]
+
+
+def test_both_halves_cover_numeric_columns(raw_data):
+    # Same text, different quantity or price: the low half must differ as well as the high half
+    rows = raw_data.iloc[[0, 0, 0]].copy()
+    rows['Quantity'] = [1, 2, 1]
+    rows['UnitPrice'] = [1.0, 1.0, 1.25]
+    hi, lo = row_digests(rows)
+    assert len(set(hi)) == 3 and len(set(lo)) == 3
+
+
+def test_same_row_from_a_workbook_and_a_csv_hashes_the_same(raw_data):
+    workbook = raw_data.iloc[:50]
+    csv = workbook.astype(str)
+    csv['CustomerID'] = workbook['CustomerID']
+    hi, lo = row_digests(workbook)
+    csv_hi, csv_lo = row_digests(csv)
+    assert (hi == csv_hi).all() and (lo == csv_lo).all()
+
+
+def mapped_files(directory):
+    """Files under directory that this process still has memory-mapped (Linux only)"""
+    with open('/proc/self/maps') as f:
+        return [line.split(None, 5)[-1].strip() for line in f if str(directory) in line]
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/maps'), reason='needs /proc/self/maps')
+def test_runs_are_unmapped_before_they_are_deleted(with_duplicates, workdir, monkeypatch):
+    # Windows refuses to delete a mapped file, so every run must be closed by the time it is removed
+    spill_dir = workdir / 'spill'
+    remove, removed = os.remove, []
+
+    def checked_remove(path):
+        assert os.path.abspath(path) not in mapped_files(spill_dir)
+        removed.append(path)
+        remove(path)
+
+    monkeypatch.setattr(os, 'remove', checked_remove)
+    with StreamingDeduplicator(memory_budget=64 * 16, spill_dir=str(spill_dir)) as dedup:
+        for rows in np.array_split(np.arange(len(with_duplicates)), 37):
+            dedup.keep_mask(with_duplicates.iloc[rows])
+    assert removed
+    assert mapped_files(spill_dir) == []
@@ -0,0 +1,62 @@
+# coding: utf-8
+
+import os
+
+import pandas as pd
+import pytest
+
+from generate_synthetic_data import write_dataset
+from retail_pipeline.ingestion import RAW_COLUMNS, discover_files, read_raw, resolve_columns
+
+
+@pytest.fixture
+def extracts(raw_data, workdir):
+    """raw_data split into one .xlsx, one .csv and one .csv.gz extract (named so they sort in order)"""
+    directory = os.path.join(workdir, 'raw')
+    parts = [raw_data.iloc[:1000], raw_data.iloc[1000:2500], raw_data.iloc[2500:]]
+    for part, name in zip(parts, ['2011-01.xlsx', '2011-02.csv', '2011-03.csv.gz']):
+        write_dataset(part, os.path.join(directory, name))
+    # Not raw data: an Excel lock file and an unrelated file
+    open(os.path.join(directory, '~$2011-01.xlsx'), 'w').close()
+    open(os.path.join(directory, 'notes.txt'), 'w').close()
+    return directory
+
+
+def test_discover_files_keeps_raw_extracts_in_order(extracts):
+    assert [os.path.basename(p) for p in discover_files(extracts)] == ['2011-01.xlsx', '2011-02.csv', '2011-03.csv.gz']
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_mixed_directory_reads_back_the_generated_data(extracts, raw_data, workers):
+    data = read_raw(extracts, workers=workers)
+    assert list(data.columns) == RAW_COLUMNS
+    pd.testing.assert_frame_equal(data, raw_data[RAW_COLUMNS].reset_index(drop=True), check_dtype=False)
+    assert data['Quantity'].dtype == 'int64'
+    assert data['CustomerID'].dtype == 'float64'
+
+
+def test_glob_reads_only_matching_files(extracts, raw_data):
+    data = read_raw(os.path.join(extracts, '*.csv*'), workers=1)
+    pd.testing.assert_frame_equal(data, raw_data[RAW_COLUMNS].iloc[1000:].reset_index(drop=True), check_dtype=False)
+
+
+def test_online_retail_ii_headers(raw_data, workdir):
+    renamed = raw_data.rename(columns={'InvoiceNo': 'Invoice', 'UnitPrice': 'Price', 'CustomerID': 'Customer ID'})
+    write_dataset(renamed, 'online_retail_ii.csv')
+    assert resolve_columns(renamed.columns, 'online_retail_ii.csv') == {
+        'Invoice': 'InvoiceNo', 'StockCode': 'StockCode', 'Description': 'Description', 'Quantity': 'Quantity',
+        'InvoiceDate': 'InvoiceDate', 'Price': 'UnitPrice', 'Customer ID': 'CustomerID', 'Country': 'Country'}
+
+    data = read_raw('online_retail_ii.csv', workers=1)
+    pd.testing.assert_frame_equal(data, raw_data[RAW_COLUMNS], check_dtype=False)
+
+
+def test_missing_column_is_reported():
+    header = ['Invoice', 'StockCode', 'Description', 'Quantity', 'InvoiceDate', 'Price', 'Country']
+    with pytest.raises(ValueError, match=r"extract\.csv: missing columns \['CustomerID'\]"):
+        resolve_columns(header, 'extract.csv')
+
+
+def test_empty_source_is_reported(workdir):
+    with pytest.raises(FileNotFoundError, match='No .xlsx, .csv or .csv.gz files'):
+        discover_files(str(workdir))
@@ -0,0 +1,17 @@
+# coding: utf-8
+
+from analytics_service import AnalyticsService
+from retail_pipeline.aggregation import load_or_build_aggregates
+from retail_pipeline.queries import print_answers
+
+
+def test_answers_cover_every_question_and_print(cleaned, capsys):
+    service = AnalyticsService(cleaned, *load_or_build_aggregates(cleaned), 'csv')
+    answers = service.answers()
+    print_answers(answers)
+    printed = capsys.readouterr().out
+    for number in range(1, 5):
+        assert f"\n{number}. " in printed
+    best = answers['question_1_best_customers']['by_revenue']
+    assert f"Customer ID {best['customer_id']} with ${best['total_revenue']:,.2f}" in printed
+    assert f"({answers['question_4_returns']['returned_share']:.1%} returned)" in printed
@@ -0,0 +1,93 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from retail_pipeline.returns import add_net_columns, cancellation_lines, match_returns
+
+
+def lines(rows):
+    """Line items from (InvoiceNo, date, StockCode, Quantity, CustomerID) tuples"""
+    frame = pd.DataFrame(rows, columns=['InvoiceNo', 'InvoiceDate', 'StockCode', 'Quantity', 'CustomerID'])
+    frame['InvoiceDate'] = pd.to_datetime(frame['InvoiceDate'])
+    frame['UnitPrice'] = 2.0
+    return frame
+
+
+PURCHASES = lines([
+    ('100', '2011-01-01', 'A', 5, 1.0),
+    ('101', '2011-01-05', 'A', 3, 1.0),
+    ('102', '2011-01-10', 'A', 4, 1.0),
+    ('103', '2011-01-02', 'B', 2, 1.0),
+    ('104', '2011-01-03', 'A', 6, np.nan),
+    ('105', '2011-01-04', 'A', 1, 2.0),
+])
+
+
+def test_fifo_allocation_with_partial_matches():
+    cancellations = lines([
+        ('C200', '2011-01-06', 'A', -6, 1.0),   # all of 100 and one unit of 101
+        ('C201', '2011-01-07', 'A', -4, 1.0),   # only two units of 101 were bought by then
+    ])
+    returned, links, matched = match_returns(PURCHASES, cancellations)
+    assert returned.tolist() == [5, 3, 0, 0, 0, 0]
+    assert matched.tolist() == [6, 2]
+    assert links[['CancellationInvoice', 'PurchaseInvoice', 'Quantity']].values.tolist() == [
+        ['C200', '100', 5], ['C200', '101', 1], ['C201', '101', 2]]
+    assert links['ReturnedRevenue'].sum() == pytest.approx(16.0)
+
+
+def test_returns_only_match_earlier_purchases_of_the_same_customer_and_product():
+    cancellations = lines([
+        ('C300', '2010-12-31', 'A', -2, 1.0),   # before any purchase
+        ('C301', '2011-01-06', 'A', -1, np.nan),  # no customer
+        ('C302', '2011-01-06', 'B', -5, 2.0),   # customer 2 never bought B
+        ('C303', '2011-01-06', 'a ', -1, 2.0),  # stock codes compare normalized
+    ])
+    returned, links, matched = match_returns(PURCHASES, cancellations)
+    assert matched.tolist() == [0, 0, 0, 1]
+    assert returned.tolist() == [0, 0, 0, 0, 0, 1]
+    assert links['PurchaseInvoice'].tolist() == ['105']
+
+
+def naive_match(purchases, cancellations):
+    """Greedy reference: each cancellation, in time order, takes units from the oldest earlier purchases"""
+    remaining = purchases['Quantity'].astype(int).copy()
+    returned = pd.Series(0, index=purchases.index)
+    matched = pd.Series(0, index=cancellations.index)
+    known = purchases[purchases['CustomerID'].notna()]
+    code = known['StockCode'].str.strip().str.upper()
+    for j, row in cancellations.sort_values('InvoiceDate', kind='stable').iterrows():
+        if pd.isna(row['CustomerID']):
+            continue
+        same = known[(known['CustomerID'] == row['CustomerID']) & (code == row['StockCode'].strip().upper())
+                     & (known['InvoiceDate'] <= row['InvoiceDate'])]
+        wanted = -row['Quantity']
+        for i in same.sort_values('InvoiceDate', kind='stable').index:
+            take = min(wanted, remaining[i])
+            remaining[i] -= take
+            returned[i] += take
+            matched[j] += take
+            wanted -= take
+    return returned, matched
+
+
+def test_match_returns_agrees_with_a_greedy_match(raw_data):
+    purchases = raw_data[raw_data['Quantity'] > 0]
+    cancellations = cancellation_lines(raw_data)
+    returned, links, matched = match_returns(purchases, cancellations)
+    expected_returned, expected_matched = naive_match(purchases, cancellations)
+    assert matched.sum() > 0
+    assert (returned == expected_returned).all()
+    assert (matched == expected_matched).all()
+    assert links['Quantity'].sum() == matched.sum()
+
+
+def test_net_columns():
+    returned, _, _ = match_returns(PURCHASES, lines([('C400', '2011-01-06', 'A', -6, 1.0)]))
+    net = add_net_columns(PURCHASES.copy(), returned)
+    assert net['NetQuantity'].tolist() == [0, 2, 4, 2, 6, 1]
+    assert net['NetRevenue'].sum() == pytest.approx(2.0 * 15)
+    assert net.loc[net['InvoiceNo'] == '100', 'InvoiceReturnRate'].item() == 1.0
+    assert net.loc[net['InvoiceNo'] == '103', 'InvoiceReturnRate'].item() == 0.0
@@ -0,0 +1,24 @@
+# coding: utf-8
+
+import pandas as pd
+
+from generate_synthetic_data import COLUMNS, generate_retail_data
+
+
+def test_same_seed_gives_the_same_data():
+    first = generate_retail_data(2000, seed=11)
+    second = generate_retail_data(2000, seed=11)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_different_seeds_give_different_data():
+    first = generate_retail_data(2000, seed=11)
+    second = generate_retail_data(2000, seed=12)
+    assert not first.equals(second)
+
+
+def test_requested_rows_and_columns():
+    data = generate_retail_data(1500, seed=3)
+    assert len(data) == 1500
+    assert list(data.columns) == COLUMNS
+    assert data['InvoiceNo'].str.startswith('C').any()
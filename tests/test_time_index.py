@@ -0,0 +1,141 @@
+# coding: utf-8
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from retail_pipeline.config import CLEANED_FILE
+from retail_pipeline.time_index import TIME_INDEX_FILE, TimeIndex, load_or_build_time_index
+
+
+def reference(rows):
+    """Totals of the time index measures computed directly from the rows"""
+    return {'revenue': rows['TotalRevenue'].sum(), 'net_revenue': rows['NetRevenue'].sum(),
+            'quantity': int(rows['Quantity'].sum()), 'invoices': rows['InvoiceNo'].nunique(),
+            'lines': len(rows)}
+
+
+def between(data, start, end):
+    """Rows in [start, end) with both bounds rounded down to the hour, like TimeIndex.range"""
+    dates = data['InvoiceDate']
+    return data[(dates >= pd.Timestamp(start).floor('h')) & (dates < pd.Timestamp(end).floor('h'))]
+
+
+@pytest.fixture
+def index(cleaned):
+    return TimeIndex.build(cleaned)
+
+
+@pytest.mark.parametrize('start, end', [
+    (None, None),
+    ('2011-03-01', '2011-06-01'),
+    # Bounds inside an hour and outside the indexed range
+    ('2011-02-14 10:45', '2011-02-20 16:05'),
+    ('2000-01-01', '2011-01-01 09:30'),
+    ('2011-11-30 12:00', '2030-01-01'),
+])
+def test_range_matches_the_rows(index, cleaned, start, end):
+    rows = between(cleaned, start or '1900-01-01', end or '2100-01-01')
+    totals = index.range(start, end)
+    expected = reference(rows)
+    for measure in ['quantity', 'invoices', 'lines']:
+        assert totals[measure] == expected[measure]
+    assert totals['revenue'] == pytest.approx(expected['revenue'])
+    assert totals['net_revenue'] == pytest.approx(expected['net_revenue'])
+
+
+def test_range_with_end_before_start_is_empty(index):
+    assert index.range('2011-06-01', '2011-03-01')['lines'] == 0
+
+
+@pytest.mark.parametrize('freq', ['D', 'W-MON', 'MS', '6h'])
+def test_resample_matches_groupby(index, cleaned, freq):
+    # Straddled bounds: the first and last periods only count the requested part
+    start, end = pd.Timestamp('2011-02-03 13:20'), pd.Timestamp('2011-05-17 08:10')
+    series = index.resample(freq, start, end)
+    rows = between(cleaned, start, end)
+    grouper = pd.Grouper(key='InvoiceDate', freq=freq, label='left', closed='left')
+    expected = rows.groupby(grouper).agg(revenue=('TotalRevenue', 'sum'), lines=('InvoiceNo', 'size'),
+                                         invoices=('InvoiceNo', 'nunique'))
+    expected = expected[expected['lines'] > 0]
+    nonempty = series[series['lines'] > 0]
+    assert len(nonempty) == len(expected)
+    assert nonempty['lines'].tolist() == expected['lines'].tolist()
+    assert nonempty['invoices'].tolist() == expected['invoices'].tolist()
+    assert np.allclose(nonempty['revenue'], expected['revenue'])
+    assert series['lines'].sum() == len(rows)
+
+
+def test_resample_rejects_sub_hour_frequencies(index):
+    with pytest.raises(ValueError):
+        index.resample('15min')
+
+
+def test_saved_index_round_trips(index):
+    index.save(TIME_INDEX_FILE)
+    loaded = TimeIndex.load(TIME_INDEX_FILE)
+    assert loaded.start == index.start and loaded.n_buckets == index.n_buckets
+    assert loaded.range('2011-03-01', '2011-06-01') == index.range('2011-03-01', '2011-06-01')
+
+
+def test_passed_dataframe_is_indexed_instead_of_a_saved_index(cleaned):
+    TimeIndex.build(cleaned).save(TIME_INDEX_FILE)
+    saved = os.path.getmtime(TIME_INDEX_FILE)
+    subset = cleaned[cleaned['Country'] != 'United Kingdom']
+    # The saved index looks fresh: there is no cleaned CSV at all
+    assert not os.path.exists(CLEANED_FILE)
+    index = load_or_build_time_index(subset)
+    assert index.range()['revenue'] == pytest.approx(subset['TotalRevenue'].sum())
+    assert os.path.getmtime(TIME_INDEX_FILE) == saved
+
+
+def test_saved_index_stands_in_for_the_csv(cleaned):
+    TimeIndex.build(cleaned.iloc[:10]).save(TIME_INDEX_FILE)
+    cleaned.to_csv(CLEANED_FILE, index=False)
+    os.utime(CLEANED_FILE, (0, 0))
+    assert load_or_build_time_index().range()['lines'] == 10
+
+
+def test_charts_use_the_index_of_their_data(cleaned, monkeypatch):
+    from analytics_service import AnalyticsService
+    from retail_pipeline import visualization
+    from retail_pipeline.aggregation import load_or_build_aggregates
+
+    # A saved index of the whole dataset must not leak into charts of a subset
+    TimeIndex.build(cleaned).save(TIME_INDEX_FILE)
+    subset = cleaned[cleaned['Country'] != 'United Kingdom']
+    frames = {}
+
+    def capture(rendered, workers, output_dir, dpi):
+        frames.update(rendered)
+        return iter([])
+
+    monkeypatch.setattr(visualization, 'render_all', capture)
+    visualization.visualize(subset, plots=['line_sales_over_time'], workers=1)
+    gross = frames['line_sales_over_time'].query("Revenue == 'Gross'")
+    assert gross['TotalRevenue'].sum() == pytest.approx(subset['TotalRevenue'].sum())
+
+    class Chart:
+        def save(self, buffer, **kwargs):
+            pass
+
+    name, filename, description, prepare, _ = visualization.get_plot('line_sales_over_time')
+    monkeypatch.setattr(visualization, 'PLOTS', [
+        (name, filename, description, prepare, lambda frame: frames.update(service=frame) or Chart())])
+    # The service hands its own index to the chart instead of reading or rebuilding one
+    index = TimeIndex.build(subset.iloc[:50])
+    service = AnalyticsService(subset, *load_or_build_aggregates(subset), 'csv', time_index=index)
+    service.chart('line_sales_over_time', dpi=10)
+    gross = frames['service'].query("Revenue == 'Gross'")
+    assert gross['TotalRevenue'].sum() == pytest.approx(index.range()['revenue'])
+
+
+def test_empty_data_gives_an_empty_index(cleaned):
+    index = TimeIndex.build(cleaned.iloc[:0])
+    assert index.n_buckets == 0
+    assert index.range() == {'revenue': 0.0, 'net_revenue': 0.0, 'quantity': 0, 'invoices': 0, 'lines': 0}
+    assert index.range('2011-01-01', '2011-02-01')['lines'] == 0
+    assert index.resample('D').empty
+    assert index.hourly().empty